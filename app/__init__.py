@@ -6,19 +6,28 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     
     # Configuration
     app.config['SECRET_KEY'] = 'your-secret-key-123'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tradeguide.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.update(config or {})  # overrides (tests, loadtest)
+
+    # Fast JSON (orjson) for every jsonify() response
+    from app.fastjson import OrjsonProvider
+    app.json = OrjsonProvider(app)
 
     # 2. Init Extensions
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'main.login' # Points to the login route in routes.py
 
+    # Shared cache (SQLite file in instance/) so all workers reuse one fetch
+    from app.cache import shared_cache
+    shared_cache.init_app(app)
+
     # 3. THE MISSING PIECE: User Loader
     # We must import User here (inside function) to avoid circular import errors
     from app.models import User
@@ -31,7 +40,19 @@ def create_app():
     from app.routes import bp
     app.register_blueprint(bp)
 
-    # 5. Create Database
+    # 5. Intraday Signal Stream (writes transitions to History).
+    #    Polling is started by the server entry points (run.py / gunicorn.conf.py)
+    from app.streaming import stream
+    stream.init_app(app)
+
+    # 6. Watchlist Alerts (every ticker with a rule is polled by the stream,
+    #    rules are evaluated whenever it gets fresh bars)
+    from app.alerts import alert_engine
+    alert_engine.init_app(app)
+    stream.keep_tracked(alert_engine.rule_keys)
+    stream.on_bars(alert_engine.evaluate)
+
+    # 7. Create Database
     with app.app_context():
         db.create_all()
 
@@ -0,0 +1,65 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import orjson
+
+# Async helpers for the native API (api.py), which runs on the ASGI server's
+# event loop (uvicorn - one per worker process):
+#   - every upstream call (Yahoo chart/search JSON, Google News RSS) goes over
+#     ONE pooled aiohttp session, so a pending call costs a coroutine, not a thread
+#   - the connector caps open sockets; requests beyond the cap wait in the pool's
+#     queue (as coroutines) - thousands can be pending without extra threads
+#   - pandas/indicator math runs on a BOUNDED CPU pool, so a burst of analyses
+#     queues up instead of starving the loop
+#
+# TRADEGUIDE_HTTP_CONNECTIONS -> max open upstream connections (default 100)
+# TRADEGUIDE_HTTP_PER_HOST    -> max open connections per upstream host (default 20)
+# TRADEGUIDE_CPU_THREADS      -> max concurrent indicator computations (default: CPU count)
+
+
+class AsyncRuntime:
+    def __init__(self):
+        self.pid = None
+        self.loop = None
+        self.session = None
+        self.cpu_pool = None
+
+    def _bind(self):
+        # Session/pool belong to the running loop - (re)made lazily for a new
+        # loop and after a gunicorn fork, where neither survives
+        loop = asyncio.get_running_loop()
+        if self.loop is loop and self.pid == os.getpid(): return
+        if self.pid != os.getpid():
+            self.cpu_pool = ThreadPoolExecutor(int(os.environ.get('TRADEGUIDE_CPU_THREADS', os.cpu_count() or 2)), thread_name_prefix='aio-cpu')
+        connector = aiohttp.TCPConnector(limit=int(os.environ.get('TRADEGUIDE_HTTP_CONNECTIONS', 100)),
+                                         limit_per_host=int(os.environ.get('TRADEGUIDE_HTTP_PER_HOST', 20)),
+                                         ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+        self.loop = loop
+        self.pid = os.getpid()
+
+    async def cpu(self, fn, *args, **kwargs):
+        """Indicator math on the bounded CPU pool."""
+        self._bind()
+        return await self.loop.run_in_executor(self.cpu_pool, lambda: fn(*args, **kwargs))
+
+    async def get_bytes(self, url, headers=None, timeout=5):
+        self._bind()
+        async with self.session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            return await resp.read()
+
+    async def get_json(self, url, params=None, headers=None, timeout=10):
+        self._bind()
+        async with self.session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            resp.raise_for_status()
+            return orjson.loads(await resp.read())
+
+    async def close(self):
+        """Close the pooled session (ASGI lifespan shutdown)."""
+        if self.session is not None and self.pid == os.getpid():
+            await self.session.close()
+        self.loop = None
+
+
+runtime = AsyncRuntime()
@@ -0,0 +1,153 @@
+import threading
+import numpy as np
+from . import db
+from .models import AlertRule, AlertInbox, AlertRuleVersion
+
+# Watchlist alert rules.
+# Rules are compiled into numpy arrays grouped by (ticker, interval) -> kind,
+# so a refresh only evaluates rules for the tickers that actually got new bars.
+# Any worker may change rules, so every change bumps AlertRuleVersion and the
+# process running the stream rebuilds its index when the version moves.
+
+RULE_KINDS = {
+    'SIGNAL_CHANGE': 'Signal changes',
+    'ADX_CROSS': 'ADX crosses a level',
+    'RSI_ABOVE': 'RSI rises above a level',
+    'RSI_BELOW': 'RSI falls below a level',
+    'GP_CROSS': 'Price crosses the golden pocket',
+    'LEVEL_CROSS': 'Price crosses support/resistance'
+}
+
+DEFAULT_THRESHOLDS = {'ADX_CROSS': 20.0, 'RSI_ABOVE': 70.0, 'RSI_BELOW': 30.0}
+
+
+def crossed(prev, now, level):
+    """Works on scalars or numpy arrays. NaN never crosses."""
+    return ((prev < level) & (now >= level)) | ((prev > level) & (now <= level))
+
+
+def _num(value):
+    return float('nan') if value is None else float(value)
+
+
+class AlertEngine:
+    def __init__(self):
+        self.app = None
+        self.index = None   # (ticker, interval) -> kind -> (rule_ids, user_ids, thresholds)
+        self.version = None  # AlertRuleVersion the index was built from
+        self.last = {}      # (ticker, interval) -> previous snapshot
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    # --- COMPILE ---
+    def bump(self):
+        """Mark the rules as changed. Call in the same transaction (before commit) as any rule change."""
+        if not AlertRuleVersion.query.update({AlertRuleVersion.version: AlertRuleVersion.version + 1}):
+            db.session.add(AlertRuleVersion(version_id=1, version=1))
+
+    def stored_version(self):
+        return db.session.query(AlertRuleVersion.version).scalar() or 0
+
+    def refresh(self):
+        """Rebuild the index if any process changed the rules since the last build (needs an app context)."""
+        if self.index is None or self.version != self.stored_version():
+            self.reload()
+
+    def reload(self):
+        """Rebuild the ticker -> rules index."""
+        version = self.stored_version()  # read first - a change landing mid-build just triggers another reload
+        grouped = {}
+        for rule in AlertRule.query.filter_by(active=True).all():
+            threshold = rule.threshold
+            if threshold is None:
+                threshold = DEFAULT_THRESHOLDS.get(rule.kind, float('nan'))
+            kinds = grouped.setdefault((rule.ticker, rule.interval), {})
+            kinds.setdefault(rule.kind, []).append((rule.rule_id, rule.user_id, threshold))
+
+        index = {}
+        for key, kinds in grouped.items():
+            index[key] = {}
+            for kind, rows in kinds.items():
+                rule_ids, user_ids, thresholds = zip(*rows)
+                index[key][kind] = (np.array(rule_ids), np.array(user_ids), np.array(thresholds, dtype=float))
+
+        with self.lock:
+            self.index = index
+            self.version = version
+
+    def rule_keys(self):
+        """(ticker, interval) pairs with an active rule - the stream keeps these polled."""
+        if self.app is None: return []
+        with self.app.app_context():
+            self.refresh()
+        return list(self.index.keys())
+
+    # --- EVALUATE ---
+    def evaluate(self, snapshots):
+        """
+        snapshots: {(ticker, interval): snapshot}. Each snapshot is compared with
+        the previous one for the same key; fired rules are written to the inbox
+        in a single commit. Returns the number of deliveries.
+        """
+        if self.app is None: return 0
+        with self.app.app_context():
+            self.refresh()
+
+            deliveries = []
+            with self.lock:
+                for key, snap in snapshots.items():
+                    kinds = self.index.get(key)
+                    prev = self.last.get(key)
+                    if kinds:
+                        self.last[key] = snap
+                    else:
+                        self.last.pop(key, None)
+                    if not kinds or prev is None:
+                        continue
+                    for kind, (rule_ids, user_ids, thresholds) in kinds.items():
+                        deliveries.extend(self._fire(key[0], kind, prev, snap, rule_ids, user_ids, thresholds))
+
+            if not deliveries: return 0
+            try:
+                db.session.add_all(deliveries)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Alert Save Error: {e}")
+                return 0
+            return len(deliveries)
+
+    def _fire(self, ticker, kind, prev, now, rule_ids, user_ids, thresholds):
+        if kind == 'SIGNAL_CHANGE':
+            hit = np.full(len(rule_ids), prev['signal'] != now['signal'])
+            message = lambda t: f"{ticker} signal changed: {prev['signal']} → {now['signal']}"
+        elif kind == 'ADX_CROSS':
+            hit = crossed(_num(prev['adx']), _num(now['adx']), thresholds)
+            message = lambda t: f"{ticker} ADX crossed {t:g} (now {_num(now['adx']):.1f})"
+        elif kind == 'RSI_ABOVE':
+            hit = (_num(prev['rsi']) <= thresholds) & (_num(now['rsi']) > thresholds)
+            message = lambda t: f"{ticker} RSI rose above {t:g} (now {_num(now['rsi']):.1f})"
+        elif kind == 'RSI_BELOW':
+            hit = (_num(prev['rsi']) >= thresholds) & (_num(now['rsi']) < thresholds)
+            message = lambda t: f"{ticker} RSI fell below {t:g} (now {_num(now['rsi']):.1f})"
+        elif kind == 'GP_CROSS':
+            gp = _num(now['golden_pocket'])
+            hit = np.full(len(rule_ids), bool(crossed(_num(prev['price']), _num(now['price']), gp)))
+            message = lambda t: f"{ticker} price crossed golden pocket {gp:.2f} (now {_num(now['price']):.2f})"
+        elif kind == 'LEVEL_CROSS':
+            levels = np.array(now.get('levels') or [], dtype=float)
+            level_hits = levels[crossed(_num(prev['price']), _num(now['price']), levels)]
+            hit = np.full(len(rule_ids), len(level_hits) > 0)
+            message = lambda t: f"{ticker} price crossed S/R level {level_hits[0]:.2f} (now {_num(now['price']):.2f})"
+        else:
+            return []
+
+        return [
+            AlertInbox(user_id=int(user_id), rule_id=int(rule_id), ticker=ticker, message=message(threshold))
+            for rule_id, user_id, threshold in zip(rule_ids[hit], user_ids[hit], thresholds[hit])
+        ]
+
+
+alert_engine = AlertEngine()
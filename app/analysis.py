@@ -1,33 +1,39 @@
-import yfinance as yf
+import asyncio
+import hashlib
+import os
 import pandas as pd
 import numpy as np
 from textblob import TextBlob  # Make sure to run: pip install textblob
+from . import market_data
+from .cache import shared_cache
+from .results import SignalResult, Levels, candles
+
+# Part of every cache key - any edit to the modules that shape cached frames/results
+# (including the pickled SignalResult slots) invalidates them
+_ENGINE_FILES = ('analysis.py', 'indicators.py', 'results.py')
+_digest = hashlib.sha1()
+for _name in _ENGINE_FILES:
+    with open(os.path.join(os.path.dirname(__file__), _name), 'rb') as _src:
+        _digest.update(_src.read())
+ENGINE_VERSION = _digest.hexdigest()[:12]
 
 class TradeGuideEngine:
     def __init__(self, ticker):
         self.ticker = ticker
+        self.interval = "1d"
         self.data = None
         self.news_sentiment = 0  # Stores sentiment score (-1 to +1)
 
     def fetch_data(self, interval="1d"):
+        self.interval = interval
         try:
             # 1. Fetch Price Data
-            stock = yf.Ticker(self.ticker)
             period = "1y" if interval == "1d" else "1mo"
-            self.data = stock.history(period=period, interval=interval)
+            self.data = market_data.history(self.ticker, period=period, interval=interval)
             
             # 2. Fetch News & Analyze Sentiment (The "High Level" Layer)
             try:
-                news_list = stock.news
-                sentiment_score = 0
-                count = 0
-                if news_list:
-                    for item in news_list[:5]:  # Analyze last 5 headlines
-                        blob = TextBlob(item['title'])
-                        sentiment_score += blob.sentiment.polarity
-                        count += 1
-                    if count > 0:
-                        self.news_sentiment = sentiment_score / count
+                self.news_sentiment = self.score_headlines(market_data.news(self.ticker))
             except Exception as e:
                 print(f"News Error: {e}")
                 self.news_sentiment = 0  # Neutral if fails
@@ -38,6 +44,36 @@ class TradeGuideEngine:
             print(f"Data Fetch Error: {e}")
             return False
 
+    async def fetch_data_async(self, interval="1d"):
+        # Same as fetch_data, over the pooled aiohttp session - prices and headlines in parallel
+        self.interval = interval
+        period = "1y" if interval == "1d" else "1mo"
+        data, news_list = await asyncio.gather(market_data.history_async(self.ticker, period=period, interval=interval),
+                                               market_data.news_async(self.ticker), return_exceptions=True)
+        try:
+            if isinstance(news_list, Exception): raise news_list
+            self.news_sentiment = self.score_headlines(news_list)
+        except Exception as e:
+            print(f"News Error: {e}")
+            self.news_sentiment = 0
+
+        if isinstance(data, Exception):
+            print(f"Data Fetch Error: {data}")
+            return False
+        self.data = data
+        return not data.empty
+
+    @staticmethod
+    def score_headlines(news_list):
+        """Average TextBlob polarity of the last 5 headlines (-1 to +1)."""
+        scores = []
+        for item in (news_list or [])[:5]:
+            # search results carry 'title', yfinance's .news nests it under 'content'
+            title = item.get('title') or (item.get('content') or {}).get('title')
+            if title:
+                scores.append(TextBlob(title).sentiment.polarity)
+        return sum(scores) / len(scores) if scores else 0
+
     # --- MARKET REGIME (ADX) ---
     def calculate_adx(self, df, period=14):
         """
@@ -88,6 +124,43 @@ class TradeGuideEngine:
                      df.at[df.index[i], 'OB'] = 'BEARISH'
         return df
 
+    # --- TRAP DETECTOR (VOLUME DIVERGENCE) ---
+    def calculate_trap_detector(self, df, window=20):
+        """
+        Breakout of the previous `window`-bar range on below-average volume = trap.
+        Streaming equivalent: indicators.TrapDetector
+        """
+        vol = df['Volume'].astype(float)
+        vol_mean = vol.rolling(window).mean().shift(1)
+        vol_std = vol.rolling(window).std().shift(1)
+        df['VOL_Z'] = (vol - vol_mean) / vol_std.replace(0, np.nan)
+
+        prior_high = df['High'].rolling(window).max().shift(1)
+        prior_low = df['Low'].rolling(window).min().shift(1)
+        weak_volume = df['VOL_Z'] < 0
+
+        df['TRAP'] = None
+        df.loc[(df['Close'] > prior_high) & weak_volume, 'TRAP'] = 'BULL TRAP'
+        df.loc[(df['Close'] < prior_low) & weak_volume, 'TRAP'] = 'BEAR TRAP'
+        return df
+
+    # --- OPTION DECAY METER (HV vs ADX) ---
+    def calculate_option_decay(self, df, window=20, periods_per_year=252):
+        """
+        Needs the ADX column. HIGH decay = no trend while volatility is rich.
+        Streaming equivalent: indicators.DecayMeter
+        """
+        log_ret = np.log(df['Close'] / df['Close'].shift(1))
+        df['HV'] = log_ret.rolling(window).std() * np.sqrt(periods_per_year) * 100
+        hv_avg = df['HV'].rolling(window).mean()
+
+        df['DECAY'] = np.select(
+            [df['ADX'] >= 25, (df['ADX'] < 20) & (df['HV'] >= hv_avg)],
+            ['LOW', 'HIGH'],
+            default='MODERATE'
+        )
+        return df
+
     # --- FIBONACCI (FIXED KEYS) ---
     def calculate_fibonacci(self, df):
         recent_data = df.tail(50)
@@ -105,12 +178,17 @@ class TradeGuideEngine:
 
     # --- SUPPORT & RESISTANCE ---
     def calculate_support_resistance(self, df, window=20):
-        levels = []
-        for i in range(window, len(df) - window):
-            if df['High'].iloc[i] == max(df['High'].iloc[i-window:i+window]):
-                levels.append(df['High'].iloc[i])
-            elif df['Low'].iloc[i] == min(df['Low'].iloc[i-window:i+window]):
-                levels.append(df['Low'].iloc[i])
+        # Swing point = bar equal to the max/min of [i-window, i+window)
+        span = 2 * window
+        swing_high = df['High'] == df['High'].rolling(span).max().shift(-(window - 1))
+        swing_low = df['Low'] == df['Low'].rolling(span).min().shift(-(window - 1))
+        in_range = np.zeros(len(df), dtype=bool)
+        in_range[window:len(df) - window] = True
+
+        levels = np.concatenate([
+            df['High'].values[swing_high.values & in_range],
+            df['Low'].values[swing_low.values & ~swing_high.values & in_range]
+        ]).tolist()
         
         clean_levels = []
         if levels:
@@ -121,30 +199,19 @@ class TradeGuideEngine:
                     clean_levels.append(lvl)
         return clean_levels[-3:]
 
-    # --- GENERATE SIGNAL (FIXED RSI & JSON) ---
-    def generate_signal(self, style='candle'):
-        if self.data is None or self.data.empty: return None
-
-        df = self.data.copy()
-        
-        # 1. Run Calculations
-        df = self.calculate_adx(df)
-        df = self.calculate_smart_money(df)
-        
-        # Standard Indicators
-        df['EMA_9'] = df['Close'].ewm(span=9, adjust=False).mean()
-        df['EMA_21'] = df['Close'].ewm(span=21, adjust=False).mean()
-        df['RSI'] = 100 - (100 / (1 + (df['Close'].diff().where(df['Close'].diff() > 0, 0).rolling(14).mean() / (-df['Close'].diff().where(df['Close'].diff() < 0, 0)).rolling(14).mean())))
-
-        latest = df.iloc[-1]
+    # --- SCORING (LATEST BAR ONLY) ---
+    def score_snapshot(self, snap):
+        """
+        Scores one bar's indicator values. Shared by generate_signal and the
+        streaming updater (streaming.py), so both produce identical signals.
+        snap keys: adx, ema_9, ema_21, rsi, bullish_ob, trap, vol_z, decay, hv
+        """
         score = 0
         reasons = []
 
-        # 2. Logic Layer (Technicals + Sentiment + SMC)
-        
         # Market Regime (ADX)
         market_status = "Trending"
-        if latest['ADX'] < 20:
+        if snap['adx'] < 20:
             market_status = "Choppy (Sideways)"
             score -= 10  # Penalty for choppy market
             reasons.append("⚠️ Market is Choppy (Low ADX). Risk of fakeouts.")
@@ -160,12 +227,12 @@ class TradeGuideEngine:
             reasons.append(f"⚠️ Negative News Sentiment ({round(self.news_sentiment, 2)})")
 
         # Technicals
-        if latest['EMA_9'] > latest['EMA_21']:
+        if snap['ema_9'] > snap['ema_21']:
             score += 1
             reasons.append("Bullish Trend (EMA Cross)")
         
         # FIX: Handle RSI NaN
-        current_rsi = latest['RSI']
+        current_rsi = snap['rsi']
         if pd.isna(current_rsi):
             current_rsi = 50.0 # Default neutral if not enough data
             
@@ -177,47 +244,135 @@ class TradeGuideEngine:
             reasons.append("RSI Overbought (Risk)")
 
         # SMC
-        recent_obs = df.tail(5)
-        if 'BULLISH' in recent_obs['OB'].values:
+        if snap['bullish_ob']:
             score += 1
             reasons.append("🔥 Bullish Order Block Detected")
+
+        # Trap Detector (Volume Divergence)
+        trap = snap['trap']
+        if trap == 'BULL TRAP':
+            score -= 2
+            reasons.append(f"⚠️ TRAP DETECTED: Breakout on weak volume (Vol Z {round(snap['vol_z'], 2)})")
+        elif trap == 'BEAR TRAP':
+            score += 1
+            reasons.append(f"🪤 Bear Trap: Breakdown on weak volume (Vol Z {round(snap['vol_z'], 2)})")
+
+        # Option Decay Meter
+        decay = snap['decay']
+        hv = snap['hv']
+        if pd.isna(hv):
+            hv = 0.0
+        if decay == 'HIGH':
+            score -= 1
+            reasons.append(f"⏳ High Option Decay Risk (HV {round(hv, 1)}% with weak trend)")
         
-        # 3. Final Signal
+        # Final Signal
         if score >= 3: signal = "STRONG BUY"
         elif score >= 1: signal = "BUY"
         elif score <= -2: signal = "STRONG SELL"
         elif score <= -1: signal = "SELL"
         else: signal = "NEUTRAL / WAIT"
 
-        # 4. Chart Data
-        chart_data = []
-        for idx, row in df.iterrows():
-            chart_data.append({
-                'x': int(idx.timestamp() * 1000),
-                'y': [row['Open'], row['High'], row['Low'], row['Close']]
-            })
-
-        fib_levels = self.calculate_fibonacci(df)
-
-        # 5. FINAL RETURN (Clean Data for Frontend)
         return {
-            "ticker": self.ticker,
-            "current_price": round(latest['Close'], 2),
             "signal": signal,
             "score": score,
-            "adx": round(latest['ADX'], 2),
             "market_status": market_status,
-            "news_sentiment": round(self.news_sentiment, 2),
+            "rsi": current_rsi,
+            "hv": hv,
+            "reasons": reasons
+        }
+
+    # --- CACHE FINGERPRINT ---
+    def fingerprint(self):
+        """Identifies the exact bars this engine holds: ticker, interval, last bar, OHLCV hash, engine version."""
+        bars = self.data[['Open', 'High', 'Low', 'Close', 'Volume']]
+        bar_hash = hashlib.sha1(pd.util.hash_pandas_object(bars, index=True).values.tobytes()).hexdigest()[:16]
+        return f"{self.ticker}:{self.interval}:{int(bars.index[-1].timestamp())}:{bar_hash}:{ENGINE_VERSION}"
+
+    # --- INDICATOR FRAME (EXPENSIVE STAGE) ---
+    def build_frame(self):
+        df = self.data.copy()
+        
+        # 1. Run Calculations
+        df = self.calculate_adx(df)
+        df = self.calculate_smart_money(df)
+        df = self.calculate_trap_detector(df)
+        df = self.calculate_option_decay(df)
+        
+        # Standard Indicators
+        df['EMA_9'] = df['Close'].ewm(span=9, adjust=False).mean()
+        df['EMA_21'] = df['Close'].ewm(span=21, adjust=False).mean()
+        df['RSI'] = 100 - (100 / (1 + (df['Close'].diff().where(df['Close'].diff() > 0, 0).rolling(14).mean() / (-df['Close'].diff().where(df['Close'].diff() < 0, 0)).rolling(14).mean())))
+        return df
+
+    # --- GENERATE SIGNAL (FIXED RSI & JSON) ---
+    def generate_signal(self, style='candle'):
+        """
+        Cached in two layers (shared across workers):
+          frame:<fingerprint>            -> indicator frame, reused when only the news changes
+          signal:<fingerprint>:<news>    -> final result
+        `style` is a chart preference and doesn't change the result, so it's not in the key.
+        """
+        if self.data is None or self.data.empty: return None
+
+        frame_key = self.fingerprint()
+        # Sentiment only matters to 2 decimals (thresholds at +-0.1, shown rounded)
+        result_key = f"signal:{frame_key}:{round(self.news_sentiment, 2)}"
+        result = shared_cache.get(result_key)
+        if result is not None:
+            return result
+
+        df = shared_cache.remember(f"frame:{frame_key}", 3600, self.build_frame)
+        result = self.build_result(df)
+        shared_cache.set(result_key, result, 3600)
+        return result
+
+    # --- SCORING + SERIALIZATION (CHEAP STAGE) ---
+    def build_result(self, df):
+        latest = df.iloc[-1]
+
+        # 2. Logic Layer (Technicals + Sentiment + SMC)
+        scored = self.score_snapshot({
+            'adx': latest['ADX'],
+            'ema_9': latest['EMA_9'],
+            'ema_21': latest['EMA_21'],
+            'rsi': latest['RSI'],
+            'bullish_ob': 'BULLISH' in df.tail(5)['OB'].values,
+            'trap': latest['TRAP'],
+            'vol_z': latest['VOL_Z'],
+            'decay': latest['DECAY'],
+            'hv': latest['HV']
+        })
+
+        # 3. Chart Data
+        chart_data = candles(df)
+
+        fib_levels = self.calculate_fibonacci(df)
+        sr_levels = self.calculate_support_resistance(df)
+
+        # 4. FINAL RETURN (Clean Data for Frontend)
+        return SignalResult(
+            ticker=self.ticker,
+            current_price=round(float(latest['Close']), 2),
+            signal=scored["signal"],
+            score=int(scored["score"]),
+            adx=round(float(latest['ADX']), 2),
+            market_status=scored["market_status"],
+            news_sentiment=round(float(self.news_sentiment), 2),
             
             # --- FIXES FOR FRONTEND ---
-            "rsi": round(current_rsi, 2),  # Explicitly sending RSI
-            "golden_pocket": round(fib_levels["golden_pocket"], 2), # Explicitly sending GP
+            rsi=round(float(scored["rsi"]), 2),  # Explicitly sending RSI
+            golden_pocket=round(float(fib_levels["golden_pocket"]), 2), # Explicitly sending GP
+            trap=latest['TRAP'],
+            decay_risk=str(latest['DECAY']),
+            hv=round(float(scored["hv"]), 2),
             
-            "reasons": reasons,
-            "levels": {
-                "entry": round(latest['Close'], 2),
-                "target": round(fib_levels["high"], 2),
-                "stoploss": round(fib_levels["low"], 2)
-            },
-            "chart_data": chart_data
-        }
\ No newline at end of file
+            reasons=scored["reasons"],
+            levels=Levels(
+                entry=round(float(latest['Close']), 2),
+                target=round(float(fib_levels["high"]), 2),
+                stoploss=round(float(fib_levels["low"]), 2)
+            ),
+            support_resistance=[round(float(lvl), 2) for lvl in sr_levels],
+            chart_data=chart_data
+        )
\ No newline at end of file
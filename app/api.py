@@ -0,0 +1,257 @@
+import asyncio
+from urllib.parse import parse_qs
+from http.cookies import SimpleCookie
+import orjson
+from . import db, market_data
+from .aio import runtime
+from .analysis import TradeGuideEngine
+from .cache import shared_cache
+from .fastjson import OrjsonProvider, _default
+from .models import History
+from .news import NewsEngine
+
+# Native async API, served straight from the ASGI server's event loop (see asgi.py)
+# next to the Flask pages. A pending request here is a coroutine, not a thread:
+#   - Yahoo prices/headlines and Google News RSS go over the pooled aiohttp session (aio.py)
+#   - indicator math runs on the bounded CPU pool
+#   - SQLite (login check, History rows) runs in worker threads
+# Logged-in state comes from the same signed Flask session cookie as the pages.
+
+ROUTES = {}  # path -> (handler, methods, login required)
+
+
+def route(path, methods=('GET',), login=False):
+    def register(handler):
+        ROUTES[path] = (handler, methods, login)
+        return handler
+    return register
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.body = body
+        self.args = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        self.user_id = None  # Flask-Login id ('7' / 'admin_1') once authenticated
+
+    def json(self):
+        return orjson.loads(self.body) if self.body else {}
+
+    def cookie(self, name):
+        for key, value in self.scope.get('headers', []):
+            if key == b'cookie':
+                morsel = SimpleCookie(value.decode('latin-1')).get(name)
+                if morsel: return morsel.value
+        return None
+
+
+# --- DISPATCH ---
+async def handle(flask_app, scope, receive, send):
+    handler, methods, login = ROUTES[scope['path']]
+    request = Request(scope, await read_body(receive))
+
+    if scope['method'] not in methods:
+        return await respond(send, {'success': False, 'error': 'Method not allowed'}, 405)
+    if login:
+        request.user_id = await asyncio.to_thread(session_user, flask_app, request.cookie(flask_app.config['SESSION_COOKIE_NAME']))
+        if request.user_id is None:
+            return await respond(send, {'success': False, 'error': 'Login required'}, 401)
+
+    try:
+        payload = await handler(flask_app, request)
+    except Exception as e:
+        print(f"API Error: {e}")
+        return await respond(send, {'success': False, 'error': 'Internal error'}, 500)
+    await respond(send, payload)
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request': break
+        body += message.get('body', b'')
+        if not message.get('more_body'): break
+    return body
+
+
+async def respond(send, payload, status=200):
+    body = orjson.dumps(payload, default=_default, option=OrjsonProvider.option)
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def session_user(flask_app, cookie):
+    """Flask-Login user id from the signed session cookie, if that user still exists."""
+    if not cookie: return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        session = serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except Exception:
+        return None
+    user_id = session.get('_user_id')
+    if not user_id: return None
+
+    from .routes import load_user
+    with flask_app.app_context():
+        return user_id if load_user(user_id) is not None else None
+
+
+# --- MARKET DATA ---
+@route('/api/market_status')
+async def market_status(flask_app, request):
+    # Same snapshot for every user - fetched once per minute across all workers
+    return await shared_cache.remember_async(market_data.cache_key('market_status'), 60, build_market_status)
+
+async def build_market_status():
+    tickers = { 'NIFTY': '^NSEI', 'SENSEX': '^BSESN', 'USD/INR': 'INR=X', 'BTC': 'BTC-USD' }
+    frames = await asyncio.gather(*(market_data.history_async(symbol, period="2d") for symbol in tickers.values()),
+                                  return_exceptions=True)
+    data = {}
+    for name, hist in zip(tickers, frames):
+        try:
+            if isinstance(hist, Exception): raise hist
+            if len(hist) >= 1:
+                close = hist['Close'].iloc[-1]
+                change_pct = ((close - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100 if len(hist) >= 2 else 0.0
+                price_str = f"₹{close:.2f}" if name == 'USD/INR' else f"${close:,.0f}" if name == 'BTC' else f"{close:,.0f}"
+                data[name] = {'price': price_str, 'change': f"{change_pct:+.2f}%", 'color': '#00e676' if change_pct >= 0 else '#ff5252'}
+            else:
+                data[name] = {'price': 'Loading..', 'change': '', 'color': '#aaa'}
+        except:
+            data[name] = {'price': 'Error', 'change': '', 'color': '#aaa'}
+    return data
+
+# --- MARKET-PROOF HERO STATS ---
+@route('/api/hero_stats', login=True)
+async def hero_stats(flask_app, request):
+    return await shared_cache.remember_async(market_data.cache_key('hero_stats'), 60, build_hero_stats)
+
+async def build_hero_stats():
+    # 1. Fallback Data (So it never shows "Scanning...")
+    most_traded = {
+        "symbol": "HDFCBANK", 
+        "price": "1,450.20", 
+        "volume": "15.2M", 
+        "change": "1.25", 
+        "is_positive": True  # Standard Python bool, this is fine
+    }
+    
+    vol_shock = {
+        "symbol": "TATASTEEL", 
+        "price": "142.50", 
+        "volume": "40.5M", 
+        "change": "-0.80", 
+        "is_positive": False # Standard Python bool, this is fine
+    }
+
+    try:
+        # 2. Scan Stocks (Fetch 5 Days so it works when market is closed)
+        stocks = ['HDFCBANK.NS', 'RELIANCE.NS', 'TATASTEEL.NS', 'SBIN.NS', 'INFY.NS', 'ICICIBANK.NS']
+        
+        max_turnover = 0
+        max_volume = 0
+
+        # Fetch 5 days to get the last valid trading day (all stocks at once)
+        frames = await asyncio.gather(*(market_data.history_async(symbol, period='5d') for symbol in stocks),
+                                      return_exceptions=True)
+        
+        for symbol, hist in zip(stocks, frames):
+            try:
+                if isinstance(hist, Exception): raise hist
+                
+                if not hist.empty:
+                    # Get Last Valid Row
+                    last_row = hist.iloc[-1]
+                    prev_row = hist.iloc[-2] if len(hist) > 1 else last_row
+                    
+                    current_price = last_row['Close']
+                    volume = last_row['Volume']
+                    
+                    # Calculate change
+                    change = ((current_price - prev_row['Close']) / prev_row['Close']) * 100
+                    turnover = current_price * volume
+                    
+                    stock_data = {
+                        "symbol": symbol.replace(".NS", ""),
+                        "price": f"{current_price:,.2f}",
+                        "volume": f"{round(volume/1000000, 2)}M",
+                        "change": f"{change:.2f}",
+                        # FIX IS HERE: Force conversion to standard Python bool
+                        "is_positive": bool(change >= 0)
+                    }
+                    
+                    # Determine Winner
+                    if turnover > max_turnover:
+                        max_turnover = turnover
+                        most_traded = stock_data
+                        
+                    if volume > max_volume:
+                        max_volume = volume
+                        vol_shock = stock_data
+                        
+            except:
+                continue
+
+    except Exception as e:
+        print(f"Scanner Error: {e}")
+
+    # 3. Return Winner (Real or Fallback)
+    return {
+        "most_traded": most_traded,
+        "volume_shock": vol_shock
+    }
+
+# --- ANALYSIS ---
+@route('/api/analyze', methods=('POST',), login=True)
+async def analyze(flask_app, request):
+    from .routes import format_ticker
+    data = request.json()
+    ticker = data.get('ticker')
+    market = data.get('market', 'NSE')
+    interval = data.get('interval', '1d')
+    style = data.get('style', 'candle')
+
+    if market != 'RAW': ticker = format_ticker(ticker, market)
+
+    tech_engine = TradeGuideEngine(ticker)
+    news_engine = NewsEngine(ticker)
+
+    async def signal():
+        if not await tech_engine.fetch_data_async(interval=interval): return None
+        # generate_signal caches by bar fingerprint, so identical bars are never recomputed
+        return await runtime.cpu(tech_engine.generate_signal, style=style)
+
+    # Prices/indicators and headlines in parallel
+    result_data, news_success = await asyncio.gather(signal(), news_engine.fetch_news_async())
+
+    if result_data:
+        if not request.user_id.startswith('admin_'):
+            await asyncio.to_thread(save_history, flask_app, int(request.user_id), result_data, interval)
+        return {
+            'success': True,
+            'data': result_data,
+            'news': news_engine.get_results() if news_success else {}
+        }
+
+    return {'success': False, 'error': f'Data not found for {ticker}'}
+
+
+def save_history(flask_app, user_id, result, interval):
+    with flask_app.app_context():
+        try:
+            db.session.add(History(user_id=user_id, ticker=result.ticker, signal=result.signal,
+                                   price=result.current_price, interval=interval))
+            db.session.commit()
+        except Exception as e:
+            print(f"DB Save Error: {e}")
+
+
+# --- NEWS ---
+@route('/api/news', login=True)
+async def news(flask_app, request):
+    category = request.args.get('cat', 'finance')
+    engine = NewsEngine()
+    await engine.fetch_general_news_async(category)
+    return {'category': category, 'articles': engine.get_data(), 'summary': engine.get_results()}
@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from . import api
+from .aio import runtime
+
+# One ASGI app per worker (uvicorn):
+#   - the native async API (api.py) runs directly on the event loop
+#   - everything else is the Flask app, run in a thread pool
+#
+# WEB_THREADS -> threads for the Flask pages, per worker (default 8)
+
+page_pool = ThreadPoolExecutor(int(os.environ.get('WEB_THREADS', 8)), thread_name_prefix='pages')
+
+
+class _FlaskInstance(WsgiToAsgiInstance):
+    # asgiref runs WSGI apps thread_sensitive=True, i.e. every request of the
+    # process on ONE thread - use a real pool instead
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False, executor=page_pool)
+
+
+class FlaskToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _FlaskInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+def create_asgi_app(flask_app, polling=True):
+    pages = FlaskToAsgi(flask_app)
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] in api.ROUTES:
+            return await api.handle(flask_app, scope, receive, send)
+        await pages(scope, receive, send)
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if polling:
+                    # Every worker starts the stream poller, but only the one holding
+                    # the shared lease actually polls (see streaming.py)
+                    from .streaming import stream
+                    stream.start_polling()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await runtime.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    app.flask_app = flask_app
+    return app
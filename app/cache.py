@@ -0,0 +1,179 @@
+import asyncio
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+# Cross-process cache shared by every worker (SQLite file in the instance folder).
+# One worker fetches, the rest read the stored result:
+#   - remember() takes a short-lived lock row before computing, so workers that
+#     miss at the same moment wait for the first one instead of all hitting Yahoo.
+#   - connections are opened lazily per process/thread, so it is safe with
+#     gunicorn's preload + fork.
+#
+# TRADEGUIDE_CACHE=off disables it (everything becomes a pass-through).
+
+
+class SharedCache:
+    def __init__(self):
+        self.path = None
+        self.enabled = os.environ.get('TRADEGUIDE_CACHE', 'on') != 'off'
+        self.local = threading.local()
+
+    def init_app(self, app):
+        os.makedirs(app.instance_path, exist_ok=True)
+        self.path = app.config.get('SHARED_CACHE_PATH') or os.path.join(app.instance_path, 'shared_cache.db')
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, expires REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must not cross a fork or be shared between threads
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid() or self.local.path != self.path:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+            self.local.path = self.path
+        return conn
+
+    def active(self):
+        return self.enabled and self.path is not None
+
+    # --- BASIC GET / SET ---
+    def get(self, key):
+        if not self.active(): return None
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())).fetchone()
+            return pickle.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"Cache Read Error: {e}")
+            return None
+
+    def set(self, key, value, ttl):
+        if not self.active() or value is None: return
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl))
+            if random.random() < 0.01:
+                self.purge_expired()
+        except Exception as e:
+            print(f"Cache Write Error: {e}")
+
+    def delete(self, key):
+        if not self.active(): return
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        if not self.active(): return
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        conn.execute("DELETE FROM locks WHERE expires <= ?", (now,))
+
+    # --- FETCH ONCE FOR ALL WORKERS ---
+    def remember(self, key, ttl, producer, lock_timeout=15):
+        """Return the cached value for `key`, or compute it with producer() (once across workers)."""
+        value = self.get(key)
+        if value is not None or not self.active():
+            return value if value is not None else producer()
+
+        if self._acquire(key, lock_timeout):
+            try:
+                value = producer()
+                self.set(key, value, ttl)
+                return value
+            finally:
+                self._release(key)
+
+        # Someone else is fetching - wait for their result
+        deadline = time.time() + lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            value = self.get(key)
+            if value is not None:
+                return value
+            if not self._locked(key):
+                break  # their fetch failed, try ourselves
+        return producer()
+
+    async def remember_async(self, key, ttl, producer, lock_timeout=15):
+        """
+        remember() for coroutines: `producer` is an async function.
+        The SQLite calls run in worker threads (asyncio.to_thread) - a busy
+        database must never block the shared event loop.
+        """
+        value = await asyncio.to_thread(self.get, key)
+        if value is not None or not self.active():
+            return value if value is not None else await producer()
+
+        if await asyncio.to_thread(self._acquire, key, lock_timeout):
+            try:
+                value = await producer()
+                await asyncio.to_thread(self.set, key, value, ttl)
+                return value
+            finally:
+                await asyncio.to_thread(self._release, key)
+
+        deadline = time.time() + lock_timeout
+        while time.time() < deadline:
+            await asyncio.sleep(0.05)
+            value = await asyncio.to_thread(self.get, key)
+            if value is not None:
+                return value
+            if not await asyncio.to_thread(self._locked, key):
+                break
+        return await producer()
+
+    # --- ONE PROCESS FOR ALL WORKERS ---
+    def lease(self, key, ttl):
+        """
+        True while this process holds `key` (each call renews it for `ttl` seconds).
+        Used to run a single background job (e.g. the signal stream) per deployment;
+        if the holder dies, another process takes over once the lease expires.
+        Works even with TRADEGUIDE_CACHE=off - it's coordination, not caching.
+        """
+        if self.path is None: return True  # no shared file - single process
+        owner, now = str(os.getpid()), time.time()
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires <= ?", (key, now))
+            conn.execute("INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)", (key, owner, now + ttl))
+            cur = conn.execute("UPDATE leases SET expires = ? WHERE key = ? AND owner = ?", (now + ttl, key, owner))
+            return cur.rowcount == 1
+        except Exception as e:
+            print(f"Cache Lease Error: {e}")
+            return False
+
+    def _acquire(self, key, lock_timeout):
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires <= ?", (key, time.time()))
+            cur = conn.execute("INSERT OR IGNORE INTO locks (key, expires) VALUES (?, ?)",
+                               (key, time.time() + lock_timeout))
+            return cur.rowcount == 1
+        except Exception as e:
+            print(f"Cache Lock Error: {e}")
+            return True  # fall back to computing locally
+
+    def _locked(self, key):
+        row = self._conn().execute(
+            "SELECT 1 FROM locks WHERE key = ? AND expires > ?", (key, time.time())).fetchone()
+        return row is not None
+
+    def _release(self, key):
+        try:
+            self._conn().execute("DELETE FROM locks WHERE key = ?", (key,))
+        except Exception as e:
+            print(f"Cache Lock Error: {e}")
+
+
+shared_cache = SharedCache()
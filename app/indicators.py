@@ -0,0 +1,282 @@
+import math
+from collections import deque
+
+# Streaming (per-bar) versions of the engine indicators.
+# Each class keeps only the state it needs, so update() is O(1) per bar
+# and gives the same values as the vectorized columns in analysis.py.
+
+
+# --- ROLLING BUILDING BLOCKS ---
+class RollingStats:
+    """Rolling mean / sample std over the last `window` values."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def ready(self):
+        return len(self.values) == self.window
+
+    def mean(self):
+        if not self.ready(): return None
+        return self.total / self.window
+
+    def std(self):
+        if not self.ready() or self.window < 2: return None
+        var = (self.total_sq - (self.total * self.total) / self.window) / (self.window - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class RollingExtreme:
+    """Rolling max (or min) using a monotonic deque - amortized O(1)."""
+
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self.mode = mode
+        self.count = 0
+        self.items = deque()  # (position, value)
+
+    def _beats(self, new, old):
+        return new >= old if self.mode == 'max' else new <= old
+
+    def push(self, value):
+        while self.items and self._beats(value, self.items[-1][1]):
+            self.items.pop()
+        self.items.append((self.count, value))
+        self.count += 1
+        while self.items[0][0] <= self.count - 1 - self.window:
+            self.items.popleft()
+
+    def value(self):
+        if self.count < self.window: return None
+        return self.items[0][1]
+
+
+class EwmMean:
+    """pandas ewm(alpha=...).mean() with the default adjust=True weighting."""
+
+    def __init__(self, alpha):
+        self.decay = 1 - alpha
+        self.num = 0.0
+        self.den = 0.0
+
+    def push(self, value):
+        self.num *= self.decay
+        self.den *= self.decay
+        if value is not None and not math.isnan(value):
+            self.num += value
+            self.den += 1.0
+        return self.value()
+
+    def value(self):
+        if self.den == 0: return None
+        return self.num / self.den
+
+
+class Ema:
+    """pandas ewm(span=..., adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.current = None
+
+    def push(self, value):
+        if self.current is None:
+            self.current = value
+        else:
+            self.current = self.alpha * value + (1 - self.alpha) * self.current
+        return self.current
+
+
+# --- MARKET REGIME (ADX) ---
+class AdxState:
+    """Mirrors TradeGuideEngine.calculate_adx."""
+
+    def __init__(self, period=14):
+        alpha = 1 / period
+        self.tr = EwmMean(alpha)
+        self.plus_dm = EwmMean(alpha)
+        self.minus_dm = EwmMean(alpha)
+        self.dx = EwmMean(alpha)
+        self.prev = None  # (high, low, close)
+        self.adx = None
+
+    def update(self, high, low, close):
+        tr = high - low
+        up = down = 0.0
+        if self.prev is not None:
+            prev_high, prev_low, prev_close = self.prev
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+            up = high - prev_high
+            down = prev_low - low
+        self.prev = (high, low, close)
+
+        plus_dm = up if (up > down and up > 0) else 0.0
+        minus_dm = down if (down > up and down > 0) else 0.0
+
+        tr_avg = self.tr.push(tr)
+        plus_di = 100 * self.plus_dm.push(plus_dm) / tr_avg if tr_avg else float('nan')
+        minus_di = 100 * self.minus_dm.push(minus_dm) / tr_avg if tr_avg else float('nan')
+        di_sum = abs(plus_di + minus_di)
+        dx = abs(plus_di - minus_di) / di_sum * 100 if di_sum else float('nan')
+
+        self.adx = self.dx.push(dx)
+        return self.adx
+
+
+# --- RSI ---
+class RsiState:
+    """Simple-average RSI, same as the RSI column in generate_signal."""
+
+    def __init__(self, period=14):
+        self.gains = RollingStats(period)
+        self.losses = RollingStats(period)
+        self.prev_close = None
+        self.rsi = None
+
+    def update(self, close):
+        diff = close - self.prev_close if self.prev_close is not None else 0.0
+        self.prev_close = close
+        self.gains.push(diff if diff > 0 else 0.0)
+        self.losses.push(-diff if diff < 0 else 0.0)
+
+        gain, loss = self.gains.mean(), self.losses.mean()
+        if gain is None:
+            self.rsi = None
+        elif loss == 0:
+            self.rsi = 100.0 if gain > 0 else None
+        else:
+            self.rsi = 100 - (100 / (1 + gain / loss))
+        return self.rsi
+
+
+# --- SMART MONEY CONCEPTS (SMC) ---
+class SmcState:
+    """
+    Mirrors TradeGuideEngine.calculate_smart_money.
+    An order block at bar i is only confirmed once bar i+2 exists, so the
+    label lands two bars late - exactly like the vectorized version.
+    """
+
+    def __init__(self, lookback=5):
+        self.bars = deque(maxlen=3)       # last 3 (open, high, low, close)
+        self.obs = deque(maxlen=lookback)  # OB labels for the last `lookback` bars
+        self.fvg = None
+
+    def update(self, open_, high, low, close):
+        self.bars.append((open_, high, low, close))
+        self.obs.append(None)
+        self.fvg = None
+        if len(self.bars) < 3:
+            return
+
+        b0, b1 = self.bars[0], self.bars[1]
+        # Fair Value Gap (bar i vs bar i-2)
+        if low > b0[1]:
+            if low - b0[1] > close * 0.001:
+                self.fvg = 'BULLISH'
+        elif high < b0[2]:
+            if b0[2] - high > close * 0.001:
+                self.fvg = 'BEARISH'
+
+        # Order Block for bar i-2, confirmed by bar i-1's close
+        ob = None
+        if b0[3] < b0[0]:
+            if b1[3] > b0[1]: ob = 'BULLISH'
+        elif b0[3] > b0[0]:
+            if b1[3] < b0[2]: ob = 'BEARISH'
+        if len(self.obs) >= 3:
+            self.obs[-3] = ob
+
+    def bullish_ob(self):
+        return 'BULLISH' in self.obs
+
+
+# --- TRAP DETECTOR (VOLUME DIVERGENCE) ---
+class TrapDetector:
+    """
+    Flags breakouts of the prior `window`-bar range that happen on
+    below-average volume (negative volume z-score).
+    Mirrors TradeGuideEngine.calculate_trap_detector.
+    """
+
+    def __init__(self, window=20):
+        self.volume = RollingStats(window)
+        self.highs = RollingExtreme(window, 'max')
+        self.lows = RollingExtreme(window, 'min')
+        self.vol_z = None
+        self.trap = None
+
+    def update(self, high, low, close, volume):
+        # Compare against the PREVIOUS window, then add the new bar
+        prior_high = self.highs.value()
+        prior_low = self.lows.value()
+        mean, std = self.volume.mean(), self.volume.std()
+
+        self.vol_z = None
+        if mean is not None and std:
+            self.vol_z = (volume - mean) / std
+
+        self.trap = None
+        if self.vol_z is not None and self.vol_z < 0:
+            if prior_high is not None and close > prior_high:
+                self.trap = 'BULL TRAP'
+            elif prior_low is not None and close < prior_low:
+                self.trap = 'BEAR TRAP'
+
+        self.volume.push(volume)
+        self.highs.push(high)
+        self.lows.push(low)
+        return self.trap
+
+
+# --- OPTION DECAY METER (HV vs ADX) ---
+class DecayMeter:
+    """
+    Historical volatility vs trend strength.
+    HIGH decay risk = no trend (ADX < 20) while volatility is at/above its average.
+    Mirrors TradeGuideEngine.calculate_option_decay.
+    """
+
+    def __init__(self, window=20, periods_per_year=252):
+        self.returns = RollingStats(window)
+        self.hv_stats = RollingStats(window)
+        self.scale = math.sqrt(periods_per_year) * 100
+        self.prev_close = None
+        self.hv = None
+        self.decay = None
+
+    def update(self, close, adx):
+        if self.prev_close is not None and self.prev_close > 0 and close > 0:
+            self.returns.push(math.log(close / self.prev_close))
+        self.prev_close = close
+
+        std = self.returns.std()
+        self.hv = std * self.scale if std is not None else None
+        if self.hv is not None:
+            self.hv_stats.push(self.hv)
+        hv_avg = self.hv_stats.mean()
+
+        self.decay = classify_decay(adx, self.hv, hv_avg)
+        return self.decay
+
+
+def classify_decay(adx, hv, hv_avg):
+    if adx is None or (isinstance(adx, float) and math.isnan(adx)):
+        return 'MODERATE'
+    if adx >= 25:
+        return 'LOW'
+    if adx < 20 and hv is not None and hv_avg is not None and hv >= hv_avg:
+        return 'HIGH'
+    return 'MODERATE'
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+from .aio import runtime
+from .cache import shared_cache
+
+# Every upstream call (Yahoo prices, Yahoo news, Google News RSS) goes through here.
+#
+# TRADEGUIDE_FIXTURES=live    -> normal network calls (default)
+# TRADEGUIDE_FIXTURES=record  -> network calls, responses also saved to disk
+# TRADEGUIDE_FIXTURES=replay  -> no network at all, responses read from disk
+#
+# TRADEGUIDE_FIXTURE_DIR      -> where fixtures live (default: ./fixtures)
+# TRADEGUIDE_FIXTURE_LATENCY  -> artificial delay per replayed call, in ms
+#
+# Results are kept in the shared cross-process cache (cache.py), so with
+# several workers only one of them goes upstream per key.
+#
+# The *_async versions are for the native API (api.py, on the ASGI event loop):
+# they call Yahoo's chart/search JSON endpoints over the pooled aiohttp session
+# (aio.runtime) instead of yfinance, and share keys and fixtures with the sync ones.
+
+
+class FixtureMissing(Exception):
+    pass
+
+
+config = {
+    'mode': os.environ.get('TRADEGUIDE_FIXTURES', 'live'),
+    'directory': os.environ.get('TRADEGUIDE_FIXTURE_DIR', 'fixtures'),
+    'latency': float(os.environ.get('TRADEGUIDE_FIXTURE_LATENCY', 0)) / 1000
+}
+
+
+def configure(mode=None, directory=None, latency_ms=None):
+    if mode is not None: config['mode'] = mode
+    if directory is not None: config['directory'] = directory
+    if latency_ms is not None: config['latency'] = latency_ms / 1000
+
+
+def ttl_for(interval):
+    """How long (seconds) data for a bar interval stays fresh in the shared cache."""
+    return 300 if interval in ('1d', '5d', '1wk', '1mo', '3mo') else 30
+
+
+def cache_key(kind, key=None):
+    """Shared-cache key. Includes the fixture mode, so replay never serves live data (and vice versa)."""
+    return f"{config['mode']}:{kind}:{json.dumps(key, sort_keys=True, default=str)}"
+
+
+# --- FIXTURE FILES ---
+def _path(kind, key, ext):
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return os.path.join(config['directory'], kind, f"{digest}.{ext}")
+
+
+def _load(kind, key, ext, reader, delay=True):
+    path = _path(kind, key, ext)
+    if delay and config['latency']:
+        time.sleep(config['latency'])
+    if not os.path.exists(path):
+        raise FixtureMissing(f"No {kind} fixture for {key}")
+    return reader(path)
+
+
+def _save(kind, key, ext, writer):
+    path = _path(kind, key, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer(path)
+
+
+# --- PRICE HISTORY ---
+def history(symbol, **kwargs):
+    """yf.Ticker(symbol).history(**kwargs)"""
+    key = {'symbol': symbol, **kwargs}
+    ttl = ttl_for(kwargs.get('interval', '1d'))
+    df = shared_cache.remember(cache_key('history', key), ttl, lambda: _history(key, symbol, kwargs))
+    return df if df is not None else pd.DataFrame()
+
+
+def _history(key, symbol, kwargs):
+    if config['mode'] == 'replay':
+        df = _load('history', key, 'pkl', pd.read_pickle)
+    else:
+        df = yf.Ticker(symbol).history(**kwargs)
+        if config['mode'] == 'record':
+            _save('history', key, 'pkl', df.to_pickle)
+    return df if not df.empty else None  # don't cache failed fetches
+
+
+YAHOO_CHART = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_SEARCH = "https://query2.finance.yahoo.com/v1/finance/search"
+YAHOO_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+}
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+
+def chart_frame(payload, interval='1d'):
+    """Yahoo v8 chart JSON -> the frame yf.Ticker().history() gives (auto-adjusted OHLCV)."""
+    result = (payload.get('chart') or {}).get('result') or []
+    if not result or not result[0].get('timestamp'):
+        return pd.DataFrame()
+    result = result[0]
+    quote = result['indicators']['quote'][0]
+
+    index = pd.to_datetime(result['timestamp'], unit='s', utc=True).tz_convert(result['meta'].get('exchangeTimezoneName', 'UTC'))
+    if interval in DAILY_INTERVALS:
+        index = index.normalize()
+    index.name = 'Date' if interval in DAILY_INTERVALS else 'Datetime'
+
+    df = pd.DataFrame({col.capitalize(): np.array(quote.get(col) or [np.nan] * len(index), dtype=float)
+                       for col in ('open', 'high', 'low', 'close', 'volume')}, index=index)
+
+    # auto_adjust: scale OHLC by adjclose / close (daily bars only carry adjclose)
+    adjclose = result['indicators'].get('adjclose')
+    if adjclose:
+        ratio = np.array(adjclose[0]['adjclose'], dtype=float) / df['Close'].to_numpy()
+        for col in ('Open', 'High', 'Low', 'Close'):
+            df[col] = df[col] * ratio
+    return df.dropna(how='all', subset=['Open', 'High', 'Low', 'Close'])
+
+
+async def history_async(symbol, **kwargs):
+    """history() over the pooled aiohttp session (Yahoo chart endpoint)."""
+    key = {'symbol': symbol, **kwargs}
+    ttl = ttl_for(kwargs.get('interval', '1d'))
+    df = await shared_cache.remember_async(cache_key('history', key), ttl, lambda: _history_async(key, symbol, kwargs))
+    return df if df is not None else pd.DataFrame()
+
+
+async def _history_async(key, symbol, kwargs):
+    if config['mode'] == 'replay':
+        await asyncio.sleep(config['latency'])
+        df = _load('history', key, 'pkl', pd.read_pickle, delay=False)
+    else:
+        interval = kwargs.get('interval', '1d')
+        params = {'range': kwargs.get('period', '1mo'), 'interval': interval, 'includePrePost': 'false', 'events': 'div,splits'}
+        payload = await runtime.get_json(YAHOO_CHART.format(symbol=symbol), params=params, headers=YAHOO_HEADERS)
+        df = chart_frame(payload, interval)
+        if config['mode'] == 'record':
+            _save('history', key, 'pkl', df.to_pickle)
+    return df if not df.empty else None  # don't cache failed fetches
+
+
+def download(tickers, **kwargs):
+    """yf.download(tickers, **kwargs) - batched multi-ticker history."""
+    key = {'tickers': sorted(tickers), **kwargs}
+    return shared_cache.remember(cache_key('download', key), 15, lambda: _download(key, tickers, kwargs))
+
+
+def _download(key, tickers, kwargs):
+    if config['mode'] == 'replay':
+        return _load('download', key, 'pkl', pd.read_pickle)
+
+    df = yf.download(tickers, **kwargs)
+    if config['mode'] == 'record':
+        _save('download', key, 'pkl', df.to_pickle)
+    return df
+
+
+# --- YAHOO NEWS ---
+def news(symbol):
+    """yf.Ticker(symbol).news"""
+    key = {'symbol': symbol}
+    return shared_cache.remember(cache_key('news', key), 300, lambda: _news(key, symbol))
+
+
+def _news(key, symbol):
+    if config['mode'] == 'replay':
+        return _load('news', key, 'json', lambda p: json.load(open(p, encoding='utf-8')))
+
+    items = yf.Ticker(symbol).news
+    if config['mode'] == 'record':
+        def write(p):
+            with open(p, 'w', encoding='utf-8') as f:
+                json.dump(items, f, default=str)
+        _save('news', key, 'json', write)
+    return items
+
+
+async def news_async(symbol):
+    """Headlines for `symbol` over the pooled aiohttp session (Yahoo search endpoint)."""
+    key = {'symbol': symbol}
+    return await shared_cache.remember_async(cache_key('news', key), 300, lambda: _news_async(key, symbol))
+
+
+async def _news_async(key, symbol):
+    if config['mode'] == 'replay':
+        await asyncio.sleep(config['latency'])
+        return _load('news', key, 'json', lambda p: json.load(open(p, encoding='utf-8')), delay=False)
+
+    payload = await runtime.get_json(YAHOO_SEARCH, params={'q': symbol, 'quotesCount': 0, 'newsCount': 10}, headers=YAHOO_HEADERS)
+    items = payload.get('news', [])
+    if config['mode'] == 'record':
+        def write(p):
+            with open(p, 'w', encoding='utf-8') as f:
+                json.dump(items, f, default=str)
+        _save('news', key, 'json', write)
+    return items
+
+
+# --- RSS FEEDS ---
+def rss(url, headers=None, timeout=5):
+    """Raw body of requests.get(url)."""
+    key = {'url': url}
+    return shared_cache.remember(cache_key('rss', key), 300, lambda: _rss(key, url, headers, timeout))
+
+
+def _rss(key, url, headers, timeout):
+    if config['mode'] == 'replay':
+        return _load('rss', key, 'xml', lambda p: open(p, 'rb').read())
+
+    body = requests.get(url, headers=headers, timeout=timeout).content
+    if config['mode'] == 'record':
+        def write(p):
+            with open(p, 'wb') as f:
+                f.write(body)
+        _save('rss', key, 'xml', write)
+    return body
+
+
+async def rss_async(url, headers=None, timeout=5):
+    """rss() over the pooled aiohttp session."""
+    key = {'url': url}
+    return await shared_cache.remember_async(cache_key('rss', key), 300, lambda: _rss_async(key, url, headers, timeout))
+
+
+async def _rss_async(key, url, headers, timeout):
+    if config['mode'] == 'replay':
+        await asyncio.sleep(config['latency'])
+        return _load('rss', key, 'xml', lambda p: open(p, 'rb').read(), delay=False)
+
+    body = await runtime.get_bytes(url, headers=headers, timeout=timeout)
+    if config['mode'] == 'record':
+        def write(p):
+            with open(p, 'wb') as f:
+                f.write(body)
+        _save('rss', key, 'xml', write)
+    return body
@@ -49,4 +49,38 @@ class History(db.Model):
     signal = db.Column(db.String(20), nullable=False)
     price = db.Column(db.Float, nullable=False)
     interval = db.Column(db.String(10), nullable=True)  
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+# 5. ALERT RULES (User-defined, evaluated by alerts.AlertEngine)
+class AlertRule(db.Model):
+    rule_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False)
+    ticker = db.Column(db.String(20), nullable=False, index=True)
+    interval = db.Column(db.String(10), nullable=False, default='1d')
+    kind = db.Column(db.String(20), nullable=False)  # see alerts.RULE_KINDS
+    threshold = db.Column(db.Float, nullable=True)
+    active = db.Column(db.Boolean, default=True)
+    created = db.Column(db.DateTime, default=datetime.utcnow)
+
+# 6. ALERT INBOX (In-app deliveries)
+class AlertInbox(db.Model):
+    inbox_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False, index=True)
+    rule_id = db.Column(db.Integer, db.ForeignKey('alert_rule.rule_id'), nullable=True)
+    ticker = db.Column(db.String(20), nullable=False)
+    message = db.Column(db.String(200), nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+# 7. ALERT RULE VERSION (Bumped on every rule change, so every process rebuilds its rule index)
+class AlertRuleVersion(db.Model):
+    version_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# 8. STREAM SUBSCRIPTIONS (Tickers a user follows live, read by streaming.SignalStream)
+class StreamSubscription(db.Model):
+    subscription_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.user_id'), nullable=False, index=True)
+    ticker = db.Column(db.String(20), nullable=False)
+    interval = db.Column(db.String(10), nullable=False, default='5m')
+    created = db.Column(db.DateTime, default=datetime.utcnow)
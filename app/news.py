@@ -1,7 +1,8 @@
-import requests
 from bs4 import BeautifulSoup
 from textblob import TextBlob
 import random
+from . import market_data
+from .aio import runtime
 
 class NewsEngine:
     def __init__(self, ticker=None):
@@ -12,7 +13,27 @@ class NewsEngine:
         # ... (Keep your existing stock-specific logic if you have it, or use generic logic below)
         return self.fetch_general_news()
 
+    async def fetch_news_async(self):
+        return await self.fetch_general_news_async()
+
     def fetch_general_news(self, category='finance'):
+        url, headers = self.feed_request(category)
+        try:
+            content = market_data.rss(url, headers=headers, timeout=5)
+            return self.load_feed(content)
+        except Exception as e:
+            return self.load_fallback(e)
+
+    async def fetch_general_news_async(self, category='finance'):
+        # Same as fetch_general_news, but over the pooled aiohttp session (for api.py)
+        url, headers = self.feed_request(category)
+        try:
+            content = await market_data.rss_async(url, headers=headers, timeout=5)
+            return await runtime.cpu(self.load_feed, content)
+        except Exception as e:
+            return self.load_fallback(e)
+
+    def feed_request(self, category):
         # 1. Define Search Query
         search_map = {
             'finance': 'Stock Market India',
@@ -29,54 +50,54 @@ class NewsEngine:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        return url, headers
 
-        try:
-            response = requests.get(url, headers=headers, timeout=5)
-            soup = BeautifulSoup(response.content, features="xml")
-            items = soup.findAll('item')
-            
-            if not items:
-                raise Exception("No items found")
+    def load_feed(self, content):
+        soup = BeautifulSoup(content, features="xml")
+        items = soup.findAll('item')
+        
+        if not items:
+            raise Exception("No items found")
 
-            self.news_data = []
-            for item in items[:12]:
-                title = item.title.text
-                link = item.link.text
-                pub_date = item.pubDate.text if item.pubDate else "Just now"
-                
-                # AI Sentiment Analysis
-                analysis = TextBlob(title)
-                score = analysis.sentiment.polarity
-                
-                if score > 0.1: 
-                    color = "#00e676" # Green
-                    sentiment = "Positive"
-                elif score < -0.1: 
-                    color = "#ff5252" # Red
-                    sentiment = "Negative"
-                else: 
-                    color = "#aaa"
-                    sentiment = "Neutral"
-                
-                self.news_data.append({
-                    "title": title,
-                    "link": link,
-                    "published": pub_date[:16],
-                    "color": color,
-                    "sentiment": sentiment
-                })
-            return True
+        self.news_data = []
+        for item in items[:12]:
+            title = item.title.text
+            link = item.link.text
+            pub_date = item.pubDate.text if item.pubDate else "Just now"
+            
+            # AI Sentiment Analysis
+            analysis = TextBlob(title)
+            score = analysis.sentiment.polarity
+            
+            if score > 0.1: 
+                color = "#00e676" # Green
+                sentiment = "Positive"
+            elif score < -0.1: 
+                color = "#ff5252" # Red
+                sentiment = "Negative"
+            else: 
+                color = "#aaa"
+                sentiment = "Neutral"
+            
+            self.news_data.append({
+                "title": title,
+                "link": link,
+                "published": pub_date[:16],
+                "color": color,
+                "sentiment": sentiment
+            })
+        return True
 
-        except Exception as e:
-            print(f"News Fetch Error: {e}")
-            # FALLBACK DATA (So the page is never empty)
-            self.news_data = [
-                {"title": "Market hits all-time high amidst strong global cues", "link": "#", "published": "Just now", "color": "#00e676", "sentiment": "Positive"},
-                {"title": "Inflation concerns rise as oil prices surge", "link": "#", "published": "1 hour ago", "color": "#ff5252", "sentiment": "Negative"},
-                {"title": "Tech stocks rally ahead of quarterly earnings", "link": "#", "published": "2 hours ago", "color": "#00e676", "sentiment": "Positive"},
-                {"title": "Central Bank keeps interest rates unchanged", "link": "#", "published": "Today", "color": "#aaa", "sentiment": "Neutral"},
-            ]
-            return False
+    def load_fallback(self, e):
+        print(f"News Fetch Error: {e}")
+        # FALLBACK DATA (So the page is never empty)
+        self.news_data = [
+            {"title": "Market hits all-time high amidst strong global cues", "link": "#", "published": "Just now", "color": "#00e676", "sentiment": "Positive"},
+            {"title": "Inflation concerns rise as oil prices surge", "link": "#", "published": "1 hour ago", "color": "#ff5252", "sentiment": "Negative"},
+            {"title": "Tech stocks rally ahead of quarterly earnings", "link": "#", "published": "2 hours ago", "color": "#00e676", "sentiment": "Positive"},
+            {"title": "Central Bank keeps interest rates unchanged", "link": "#", "published": "Today", "color": "#aaa", "sentiment": "Neutral"},
+        ]
+        return False
 
     def get_data(self):
         return self.news_data
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# Compact result objects for the analysis path.
+# slots=True = no per-instance __dict__, and the chart is one float64 array
+# instead of a dict + list + 5 floats per candle. Missing or unknown fields
+# fail with a TypeError where the result is built. orjson serializes dataclasses
+# natively, so fastjson.OrjsonProvider writes them straight to bytes (NumPy
+# arrays included) - no to_dict() step.
+
+
+@dataclass(slots=True)
+class Levels:
+    entry: float
+    target: float
+    stoploss: float
+
+
+@dataclass(slots=True)
+class SignalResult:
+    ticker: str
+    current_price: float
+    signal: str
+    score: int
+    adx: float
+    market_status: str
+    news_sentiment: float
+    rsi: float
+    golden_pocket: float
+    trap: str | None
+    decay_risk: str
+    hv: float
+    reasons: list[str]
+    levels: Levels
+    support_resistance: list[float]
+    chart_data: np.ndarray  # (n, 5) float64, see candles()
+
+
+def candles(df):
+    """
+    OHLC as an (n, 5) float64 array: [timestamp_ms, open, high, low, close] per row.
+    ApexCharts takes this shape directly for candlestick series.
+    """
+    epoch = pd.Timestamp(0, tz=df.index.tz)
+    ms = ((df.index - epoch) // pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.float64)
+    out = np.empty((len(df), 5), dtype=np.float64)  # C-contiguous, so orjson can write it directly
+    out[:, 0] = ms
+    out[:, 1:] = df[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=np.float64)
+    return out
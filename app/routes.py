@@ -1,12 +1,13 @@
+import math
 from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
-import yfinance as yf
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db, login_manager
-from .models import User, Admin, Watchlist, History
-from .analysis import TradeGuideEngine 
+from .models import User, Admin, Watchlist, History, AlertRule, AlertInbox, StreamSubscription
 from .news import NewsEngine
+from .streaming import stream, INTERVALS
+from .alerts import alert_engine, RULE_KINDS, DEFAULT_THRESHOLDS
 
 bp = Blueprint('main', __name__)
 
@@ -194,6 +195,10 @@ def change_password():
 def clear_data():
     Watchlist.query.filter_by(user_id=current_user.user_id).delete()
     History.query.filter_by(user_id=current_user.user_id).delete()
+    AlertInbox.query.filter_by(user_id=current_user.user_id).delete()
+    AlertRule.query.filter_by(user_id=current_user.user_id).delete()
+    StreamSubscription.query.filter_by(user_id=current_user.user_id).delete()
+    alert_engine.bump()
     db.session.commit()
     flash('All data cleared.')
     return redirect(url_for('main.settings'))
@@ -234,7 +239,8 @@ def admin_database():
 @login_required
 def admin_alerts():
     if not isinstance(current_user, Admin): return redirect(url_for('main.dashboard'))
-    return render_template('admin.html', page='alerts')
+    recent = AlertInbox.query.order_by(AlertInbox.timestamp.desc()).limit(50).all()
+    return render_template('admin.html', page='alerts', alerts=recent, rule_count=AlertRule.query.count())
 
 @bp.route('/admin/delete_user/<int:user_id>')
 @login_required
@@ -244,143 +250,195 @@ def delete_user(user_id):
     if user:
         Watchlist.query.filter_by(user_id=user_id).delete()
         History.query.filter_by(user_id=user_id).delete()
+        AlertInbox.query.filter_by(user_id=user_id).delete()
+        AlertRule.query.filter_by(user_id=user_id).delete()
+        StreamSubscription.query.filter_by(user_id=user_id).delete()
+        alert_engine.bump()
         db.session.delete(user)
         db.session.commit()
     return redirect(url_for('main.admin_users'))
 
 # --- API ROUTES ---
+# /api/market_status, /api/hero_stats, /api/analyze and /api/news are native
+# async endpoints served from the event loop - see api.py
 
-@bp.route('/api/market_status')
-def market_status():
-    tickers = { 'NIFTY': '^NSEI', 'SENSEX': '^BSESN', 'USD/INR': 'INR=X', 'BTC': 'BTC-USD' }
-    data = {}
-    for name, symbol in tickers.items():
-        try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period="2d")
-            if len(hist) >= 1:
-                close = hist['Close'].iloc[-1]
-                change_pct = ((close - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100 if len(hist) >= 2 else 0.0
-                price_str = f"₹{close:.2f}" if name == 'USD/INR' else f"${close:,.0f}" if name == 'BTC' else f"{close:,.0f}"
-                data[name] = {'price': price_str, 'change': f"{change_pct:+.2f}%", 'color': '#00e676' if change_pct >= 0 else '#ff5252'}
-            else:
-                data[name] = {'price': 'Loading..', 'change': '', 'color': '#aaa'}
-        except:
-            data[name] = {'price': 'Error', 'change': '', 'color': '#aaa'}
-    return jsonify(data)
-
-# --- MARKET-PROOF HERO STATS ---
-# --- MARKET-PROOF HERO STATS ---
-@bp.route('/api/hero_stats')
+# --- INTRADAY SIGNAL STREAM ---
+@bp.route('/api/stream/track', methods=['POST'])
 @login_required
-def hero_stats():
-    # 1. Fallback Data (So it never shows "Scanning...")
-    most_traded = {
-        "symbol": "HDFCBANK", 
-        "price": "1,450.20", 
-        "volume": "15.2M", 
-        "change": "1.25", 
-        "is_positive": True  # Standard Python bool, this is fine
-    }
-    
-    vol_shock = {
-        "symbol": "TATASTEEL", 
-        "price": "142.50", 
-        "volume": "40.5M", 
-        "change": "-0.80", 
-        "is_positive": False # Standard Python bool, this is fine
-    }
+def stream_track():
+    data = request.get_json()
+    market = data.get('market', 'NSE')
+    interval = data.get('interval', '5m')
+    ticker = data.get('ticker')
+    if market != 'RAW': ticker = format_ticker(ticker, market)
+    if not ticker: return jsonify({'success': False, 'error': 'Ticker required'})
+    if interval not in INTERVALS: return jsonify({'success': False, 'error': 'Unsupported interval'})
 
-    try:
-        # 2. Scan Stocks (Fetch 5 Days so it works when market is closed)
-        stocks = ['HDFCBANK.NS', 'RELIANCE.NS', 'TATASTEEL.NS', 'SBIN.NS', 'INFY.NS', 'ICICIBANK.NS']
-        
-        max_turnover = 0
-        max_volume = 0
-        
-        for symbol in stocks:
-            try:
-                t = yf.Ticker(symbol)
-                # Fetch 5 days to get the last valid trading day
-                hist = t.history(period='5d')
-                
-                if not hist.empty:
-                    # Get Last Valid Row
-                    last_row = hist.iloc[-1]
-                    prev_row = hist.iloc[-2] if len(hist) > 1 else last_row
-                    
-                    current_price = last_row['Close']
-                    volume = last_row['Volume']
-                    
-                    # Calculate change
-                    change = ((current_price - prev_row['Close']) / prev_row['Close']) * 100
-                    turnover = current_price * volume
-                    
-                    stock_data = {
-                        "symbol": symbol.replace(".NS", ""),
-                        "price": f"{current_price:,.2f}",
-                        "volume": f"{round(volume/1000000, 2)}M",
-                        "change": f"{change:.2f}",
-                        # FIX IS HERE: Force conversion to standard Python bool
-                        "is_positive": bool(change >= 0)
-                    }
-                    
-                    # Determine Winner
-                    if turnover > max_turnover:
-                        max_turnover = turnover
-                        most_traded = stock_data
-                        
-                    if volume > max_volume:
-                        max_volume = volume
-                        vol_shock = stock_data
-                        
-            except:
-                continue
-
-    except Exception as e:
-        print(f"Scanner Error: {e}")
-
-    # 3. Return Winner (Real or Fallback)
-    return jsonify({
-        "most_traded": most_traded,
-        "volume_shock": vol_shock
-    })
+    # Stored, not tracked in this worker - the process running the stream picks it up on its next poll
+    exists = StreamSubscription.query.filter_by(user_id=current_user.user_id, ticker=ticker, interval=interval).first()
+    if not exists:
+        db.session.add(StreamSubscription(user_id=current_user.user_id, ticker=ticker, interval=interval))
+        db.session.commit()
+    return jsonify({'success': True, 'ticker': ticker, 'interval': interval,
+                    'signal': stream.latest_signal(ticker, interval)})
 
-@bp.route('/api/analyze', methods=['POST'])
+@bp.route('/api/stream/untrack', methods=['POST'])
 @login_required
-def api_analyze():
+def stream_untrack():
     data = request.get_json()
+    market = data.get('market', 'NSE')
     ticker = data.get('ticker')
+    if market != 'RAW': ticker = format_ticker(ticker, market)
+    StreamSubscription.query.filter_by(user_id=current_user.user_id, ticker=ticker,
+                                       interval=data.get('interval', '5m')).delete()
+    db.session.commit()
+    return jsonify({'success': True})
+
+@bp.route('/api/stream/updates')
+@login_required
+def stream_updates():
+    # Transitions are stored in History, so the client just polls for new rows
+    since = request.args.get('since', 0, type=int)
+    rows = History.query.filter(History.user_id == current_user.user_id, History.history_id > since)\
+        .order_by(History.history_id.asc()).limit(100).all()
+    return jsonify([{
+        'id': h.history_id,
+        'ticker': h.ticker,
+        'signal': h.signal,
+        'price': h.price,
+        'interval': h.interval,
+        'timestamp': h.timestamp.isoformat()
+    } for h in rows])
+
+# --- WATCHLIST ALERTS ---
+def new_alert_rule(data):
+    """Validated AlertRule for the current user from form/JSON fields. Returns (rule, error)."""
+    kind = data.get('kind')
     market = data.get('market', 'NSE')
+    ticker = data.get('ticker')
     interval = data.get('interval', '1d')
-    style = data.get('style', 'candle')
-    
     if market != 'RAW': ticker = format_ticker(ticker, market)
-    
-    tech_engine = TradeGuideEngine(ticker)
-    tech_success = tech_engine.fetch_data(interval=interval)
-    news_engine = NewsEngine(ticker)
-    news_success = news_engine.fetch_news()
-    
-    if tech_success:
-        result_data = tech_engine.generate_signal(style=style)
+    if not ticker or kind not in RULE_KINDS:
+        return None, 'Invalid ticker or alert type'
+    if interval not in INTERVALS:
+        return None, 'Unsupported interval'
+
+    threshold = data.get('threshold')
+    if threshold in (None, ''):
+        threshold = None
+    else:
         try:
-            new_entry = History(
-                user_id=current_user.user_id,
-                ticker=result_data['ticker'],
-                signal=result_data['signal'],
-                price=float(result_data['current_price']),
-                interval=interval
-            )
-            db.session.add(new_entry)
-            db.session.commit()
-        except Exception as e:
-            print(f"DB Save Error: {e}")
-
-        return jsonify({
-            'success': True,
-            'data': result_data,
-            'news': news_engine.get_results() if news_success else {}
-        })
-    
-    return jsonify({'success': False, 'error': f'Data not found for {ticker}'})
+            threshold = float(threshold)
+        except (TypeError, ValueError):
+            threshold = float('nan')
+        if not math.isfinite(threshold):
+            return None, 'Threshold must be a number'
+
+    return AlertRule(user_id=current_user.user_id, ticker=ticker, interval=interval,
+                     kind=kind, threshold=threshold), None
+
+def save_alert_rule(rule):
+    db.session.add(rule)
+    alert_engine.bump()  # the stream process polls every ticker that has a rule
+    db.session.commit()
+
+def remove_alert_rule(rule_id):
+    rule = AlertRule.query.get(rule_id)
+    if rule and rule.user_id == current_user.user_id:
+        AlertInbox.query.filter_by(rule_id=rule_id).update({'rule_id': None})
+        db.session.delete(rule)
+        alert_engine.bump()
+        db.session.commit()
+
+def mark_alerts_read():
+    AlertInbox.query.filter_by(user_id=current_user.user_id, is_read=False).update({'is_read': True})
+    db.session.commit()
+
+@bp.app_context_processor
+def inject_unread_alerts():
+    # Unread badge for the sidebar "Alerts" link
+    if current_user.is_authenticated and isinstance(current_user, User):
+        return {'unread_alerts': AlertInbox.query.filter_by(user_id=current_user.user_id, is_read=False).count()}
+    return {'unread_alerts': 0}
+
+@bp.route('/alerts')
+@login_required
+def alerts_page():
+    if isinstance(current_user, Admin): return redirect(url_for('main.admin_alerts'))
+    rules = AlertRule.query.filter_by(user_id=current_user.user_id).order_by(AlertRule.created.desc()).all()
+    inbox = AlertInbox.query.filter_by(user_id=current_user.user_id)\
+        .order_by(AlertInbox.timestamp.desc()).limit(50).all()
+    return render_template('alerts.html', user=current_user, rules=rules, inbox=inbox,
+                           kinds=RULE_KINDS, intervals=INTERVALS, defaults=DEFAULT_THRESHOLDS)
+
+@bp.route('/alerts/add', methods=['POST'])
+@login_required
+def add_alert():
+    if isinstance(current_user, Admin): return redirect(url_for('main.admin_alerts'))
+    rule, error = new_alert_rule(request.form)
+    if error:
+        flash(error)
+    else:
+        save_alert_rule(rule)
+        flash(f'Alert added for {rule.ticker}.')
+    return redirect(url_for('main.alerts_page'))
+
+@bp.route('/alerts/delete/<int:rule_id>')
+@login_required
+def delete_alert(rule_id):
+    remove_alert_rule(rule_id)
+    return redirect(url_for('main.alerts_page'))
+
+@bp.route('/alerts/read', methods=['POST'])
+@login_required
+def read_alerts():
+    mark_alerts_read()
+    return redirect(url_for('main.alerts_page'))
+
+@bp.route('/api/alerts/rules', methods=['GET', 'POST'])
+@login_required
+def alert_rules():
+    if request.method == 'POST':
+        rule, error = new_alert_rule(request.get_json() or {})
+        if error:
+            return jsonify({'success': False, 'error': error})
+        save_alert_rule(rule)
+        return jsonify({'success': True, 'rule_id': rule.rule_id})
+
+    rules = AlertRule.query.filter_by(user_id=current_user.user_id).all()
+    return jsonify({'kinds': RULE_KINDS, 'rules': [{
+        'id': r.rule_id,
+        'ticker': r.ticker,
+        'interval': r.interval,
+        'kind': r.kind,
+        'threshold': r.threshold,
+        'active': r.active
+    } for r in rules]})
+
+@bp.route('/api/alerts/rules/<int:rule_id>/delete', methods=['POST'])
+@login_required
+def delete_alert_rule(rule_id):
+    remove_alert_rule(rule_id)
+    return jsonify({'success': True})
+
+@bp.route('/api/alerts/inbox')
+@login_required
+def alert_inbox():
+    items = AlertInbox.query.filter_by(user_id=current_user.user_id)\
+        .order_by(AlertInbox.timestamp.desc()).limit(50).all()
+    return jsonify({
+        'unread': AlertInbox.query.filter_by(user_id=current_user.user_id, is_read=False).count(),
+        'items': [{
+            'id': a.inbox_id,
+            'ticker': a.ticker,
+            'message': a.message,
+            'is_read': a.is_read,
+            'timestamp': a.timestamp.isoformat()
+        } for a in items]
+    })
+
+@bp.route('/api/alerts/inbox/read', methods=['POST'])
+@login_required
+def alert_inbox_read():
+    mark_alerts_read()
+    return jsonify({'success': True})
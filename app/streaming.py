@@ -0,0 +1,395 @@
+import threading
+import time
+from collections import deque
+import pandas as pd
+from . import market_data
+from .analysis import TradeGuideEngine
+from .cache import shared_cache
+from .indicators import AdxState, Ema, RsiState, SmcState, TrapDetector, DecayMeter, RollingExtreme
+
+# Long-lived intraday signal tracking.
+# Each (ticker, interval) gets a SignalState that is seeded once from history
+# and then fed one closed bar at a time - every update is O(1).
+# Only signal CHANGES (e.g. NEUTRAL -> BUY) are pushed to subscribers.
+#
+# With several workers the stream runs in ONE of them: every process calls
+# start_polling(), but only the holder of the STREAM_LEASE polls. Users'
+# tracked tickers live in the StreamSubscription table, so any worker can
+# add/remove them and the polling process picks the change up on its next poll.
+
+LEVEL_BARS = 750      # bars kept per ticker for support/resistance
+LEVEL_REFRESH = 10    # recompute support/resistance every N new bars
+
+STREAM_LEASE = 'signal-stream'
+
+# Bar intervals users can stream / set alerts on (validated by the routes)
+INTERVALS = {'5m': '5 Min', '15m': '15 Min', '1h': '1 Hour', '1d': '1 Day', '1wk': '1 Week'}
+
+# yf.download period per interval - enough for at least one CLOSED bar
+POLL_PERIOD = {'1d': '5d', '5d': '1mo', '1wk': '1mo', '1mo': '6mo', '3mo': '1y'}
+
+
+class SignalState:
+    def __init__(self, ticker, interval):
+        self.ticker = ticker
+        self.interval = interval
+        self.engine = TradeGuideEngine(ticker)  # used for scoring + news sentiment
+
+        self.adx = AdxState()
+        self.ema_9 = Ema(9)
+        self.ema_21 = Ema(21)
+        self.rsi = RsiState()
+        self.smc = SmcState()
+        self.trap = TrapDetector()
+        self.decay = DecayMeter()
+        self.fib_high = RollingExtreme(50, 'max')  # same 50-bar swing as calculate_fibonacci
+        self.fib_low = RollingExtreme(50, 'min')
+        self.levels = []  # support/resistance, refreshed every LEVEL_REFRESH bars
+        self.highs = deque(maxlen=LEVEL_BARS)
+        self.lows = deque(maxlen=LEVEL_BARS)
+        self.since_levels = 0
+
+        self.last_ts = None
+        self.price = None
+        self.signal = None
+        self.scored = None
+
+    def seed(self, df):
+        """Warm up on a full history frame without emitting transitions."""
+        for ts, o, h, l, c, v in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'], df['Volume']):
+            self.update(ts, o, h, l, c, v)
+        self.levels = self.engine.calculate_support_resistance(df)
+        self.since_levels = 0
+
+    def refresh_levels(self):
+        # Same swing-point logic as the analyze route, on the last LEVEL_BARS bars
+        recent = pd.DataFrame({'High': list(self.highs), 'Low': list(self.lows)})
+        self.levels = self.engine.calculate_support_resistance(recent)
+        self.since_levels = 0
+
+    def snapshot(self):
+        """Latest values in the shape alerts.AlertEngine expects."""
+        golden_pocket = None
+        high, low = self.fib_high.value(), self.fib_low.value()
+        if high is not None:
+            golden_pocket = low + (high - low) * 0.618
+        return {
+            "price": self.price,
+            "signal": self.signal,
+            "adx": self.adx.adx,
+            "rsi": self.rsi.rsi,  # raw - scoring's neutral 50.0 for undefined RSI must never cross a band
+            "golden_pocket": golden_pocket,
+            "levels": self.levels
+        }
+
+    def update(self, ts, open_, high, low, close, volume):
+        """Feed one closed bar. Returns a transition dict if the signal changed."""
+        if self.last_ts is not None and ts <= self.last_ts:
+            return None  # duplicate / out-of-order bar
+        self.last_ts = ts
+        self.price = close
+
+        adx = self.adx.update(high, low, close)
+        ema_9 = self.ema_9.push(close)
+        ema_21 = self.ema_21.push(close)
+        rsi = self.rsi.update(close)
+        self.smc.update(open_, high, low, close)
+        trap = self.trap.update(high, low, close, volume)
+        decay = self.decay.update(close, adx)
+        self.fib_high.push(high)
+        self.fib_low.push(low)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.since_levels += 1
+        if self.since_levels >= LEVEL_REFRESH:
+            self.refresh_levels()
+
+        self.scored = self.engine.score_snapshot({
+            'adx': adx if adx is not None else float('nan'),
+            'ema_9': ema_9,
+            'ema_21': ema_21,
+            'rsi': rsi,
+            'bullish_ob': self.smc.bullish_ob(),
+            'trap': trap,
+            'vol_z': self.trap.vol_z,
+            'decay': decay,
+            'hv': self.decay.hv
+        })
+
+        previous = self.signal
+        self.signal = self.scored['signal']
+        if previous is None or previous == self.signal:
+            return None
+
+        return {
+            "ticker": self.ticker,
+            "interval": self.interval,
+            "from": previous,
+            "to": self.signal,
+            "price": round(float(close), 2),
+            "score": self.scored['score'],
+            "timestamp": ts
+        }
+
+
+class SignalStream:
+    def __init__(self):
+        self.states = {}      # (ticker, interval) -> SignalState
+        self.watchers = {}    # (ticker, interval) -> set of user_ids
+        self.subscribers = []
+        self.bar_listeners = []
+        self.sources = []
+        self.synced = set()   # keys tracked because of a subscription/source (see sync)
+        self.lock = threading.RLock()
+        self.app = None
+        self.lease_ttl = None
+        self._poller = None
+
+    def init_app(self, app):
+        self.app = app
+        self.subscribe(self._record_history)
+
+    def subscribe(self, callback):
+        """callback(transition) is called for every signal change."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def on_bars(self, callback):
+        """callback({(ticker, interval): snapshot}) is called once per refresh with every updated ticker."""
+        if callback not in self.bar_listeners:
+            self.bar_listeners.append(callback)
+
+    def keep_tracked(self, source):
+        """source() returns (ticker, interval) keys that must stay tracked (checked on every poll)."""
+        if source not in self.sources:
+            self.sources.append(source)
+
+    # --- TRACKING ---
+    def track(self, ticker, interval, user_id=None, history=None):
+        """
+        Start tracking a ticker. Seeds from `history` if given, otherwise
+        from the same fetch the analyze route uses (prices + news sentiment).
+        """
+        key = (ticker, interval)
+        with self.lock:
+            state = self.states.get(key)
+
+        if state is None:
+            # Fetch + seed WITHOUT the lock - it's network bound and other tickers keep streaming meanwhile
+            state = SignalState(ticker, interval)
+            if history is None:
+                if state.engine.fetch_data(interval=interval):
+                    # Same rule as poll_once: the last row is the bar still forming.
+                    # Seeding it would make update() reject the closed bar as a duplicate.
+                    history = state.engine.data.iloc[:-1]
+            if history is not None and not history.empty:
+                state.seed(history)
+
+        with self.lock:
+            state = self.states.setdefault(key, state)  # another thread may have seeded it first
+            if user_id is not None:
+                self.watchers.setdefault(key, set()).add(user_id)
+            return state
+
+    def untrack(self, ticker, interval, user_id):
+        key = (ticker, interval)
+        with self.lock:
+            users = self.watchers.get(key, set())
+            users.discard(user_id)
+            if not users:
+                self.watchers.pop(key, None)
+                if key not in self.synced:
+                    self.states.pop(key, None)
+
+    def sync(self):
+        """
+        Track every key that is wanted: StreamSubscription rows plus whatever the
+        sources ask for. Keys added here are dropped once nobody wants them;
+        keys tracked directly (replay) are left alone.
+        """
+        watchers = self._subscriptions()
+        if watchers is None: return  # DB unreadable - keep streaming what we have
+        wanted = set(watchers)
+        for source in list(self.sources):
+            try:
+                wanted.update(source())
+            except Exception as e:
+                print(f"Stream Source Error: {e}")
+
+        added = []
+        for ticker, interval in wanted - set(self.tracked()):
+            self.track(ticker, interval)
+            added.append((ticker, interval))
+            if self.lease_ttl: self.lead()  # seeding many tickers can outlast the lease
+
+        with self.lock:
+            for key in self.synced - wanted:
+                self.states.pop(key, None)
+                self.watchers.pop(key, None)
+            for key in wanted:
+                self.watchers[key] = watchers.get(key, set())
+            self.synced = wanted
+        self._publish(added)
+
+    def _subscriptions(self):
+        """{(ticker, interval): {user_ids}} from StreamSubscription, or None if it can't be read."""
+        if self.app is None: return {}
+        from .models import StreamSubscription
+        with self.app.app_context():
+            try:
+                rows = StreamSubscription.query.all()
+            except Exception as e:
+                print(f"Stream Sync Error: {e}")
+                return None
+            watchers = {}
+            for row in rows:
+                watchers.setdefault((row.ticker, row.interval), set()).add(row.user_id)
+            return watchers
+
+    def _publish(self, keys):
+        # Latest signal per key for the other workers (see latest_signal)
+        with self.lock:
+            signals = {key: self.states[key].signal for key in keys if key in self.states}
+        for (ticker, interval), signal in signals.items():
+            shared_cache.set(market_data.cache_key('stream', {'ticker': ticker, 'interval': interval}), signal, 86400)
+
+    def latest_signal(self, ticker, interval):
+        """Last signal published by the polling process (None until it has seeded the ticker)."""
+        return shared_cache.get(market_data.cache_key('stream', {'ticker': ticker, 'interval': interval}))
+
+    def tracked(self):
+        with self.lock:
+            return list(self.states.keys())
+
+    # --- BAR INGESTION ---
+    def push_bar(self, ticker, interval, ts, open_, high, low, close, volume):
+        with self.lock:
+            state = self.states.get((ticker, interval))
+            if state is None: return None
+            transition = state.update(ts, open_, high, low, close, volume)
+            if transition:
+                transition['user_ids'] = list(self.watchers.get((ticker, interval), ()))
+        if transition:
+            self._emit(transition)
+        return transition
+
+    def push_frame(self, ticker, interval, df):
+        """Push every bar in `df` newer than the last one seen. Returns True if any were new."""
+        state = self.states.get((ticker, interval))
+        if state is None or df is None or df.empty: return False
+        if state.last_ts is not None:
+            df = df[df.index > state.last_ts]
+        for ts, o, h, l, c, v in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'], df['Volume']):
+            self.push_bar(ticker, interval, ts, o, h, l, c, v)
+        return not df.empty
+
+    def _notify_bars(self, keys):
+        if not keys or not self.bar_listeners: return
+        with self.lock:
+            snapshots = {key: self.states[key].snapshot() for key in keys if key in self.states}
+        for callback in list(self.bar_listeners):
+            try:
+                callback(snapshots)
+            except Exception as e:
+                print(f"Stream Listener Error: {e}")
+
+    def _emit(self, transition):
+        for callback in list(self.subscribers):
+            try:
+                callback(transition)
+            except Exception as e:
+                print(f"Stream Subscriber Error: {e}")
+
+    def _record_history(self, transition):
+        if self.app is None or not transition.get('user_ids'): return
+        from . import db
+        from .models import History
+        with self.app.app_context():
+            try:
+                for user_id in transition['user_ids']:
+                    db.session.add(History(
+                        user_id=user_id,
+                        ticker=transition['ticker'],
+                        signal=transition['to'],
+                        price=transition['price'],
+                        interval=transition['interval']
+                    ))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"DB Save Error: {e}")
+
+    # --- POLLING ---
+    def poll_once(self):
+        """One batched yfinance download per interval for all tracked tickers."""
+        self.sync()
+        by_interval = {}
+        updated = []
+        for ticker, interval in self.tracked():
+            by_interval.setdefault(interval, []).append(ticker)
+
+        for interval, tickers in by_interval.items():
+            try:
+                frame = market_data.download(tickers, period=POLL_PERIOD.get(interval, '1d'), interval=interval,
+                                             group_by='ticker', progress=False, threads=True)
+            except Exception as e:
+                print(f"Stream Poll Error: {e}")
+                continue
+            if frame is None or frame.empty: continue
+
+            for ticker in tickers:
+                try:
+                    bars = frame[ticker] if isinstance(frame.columns, pd.MultiIndex) else frame
+                except KeyError:
+                    continue
+                bars = bars.dropna(subset=['Close'])
+                # Last row is the bar still forming - wait until it closes
+                if self.push_frame(ticker, interval, bars.iloc[:-1]):
+                    updated.append((ticker, interval))
+
+        self._publish(updated)
+        self._notify_bars(updated)
+
+    def lead(self):
+        return shared_cache.lease(STREAM_LEASE, self.lease_ttl)
+
+    def start_polling(self, every=30):
+        """
+        Call once per server process. Only the STREAM_LEASE holder polls, so each
+        ticker is streamed (and History/alerts written) once per deployment;
+        if that process exits, another one takes over when the lease expires.
+        """
+        if self._poller and self._poller.is_alive(): return
+        self.lease_ttl = every * 4
+        def loop():
+            while True:
+                try:
+                    if self.lead():
+                        self.poll_once()
+                    elif self.synced:
+                        self.step_down()
+                except Exception as e:
+                    print(f"Stream Poll Error: {e}")
+                time.sleep(every)
+        self._poller = threading.Thread(target=loop, name='signal-stream', daemon=True)
+        self._poller.start()
+
+    def step_down(self):
+        # Lost the lease (e.g. stalled past its ttl) - another process streams these now
+        with self.lock:
+            for key in self.synced:
+                self.states.pop(key, None)
+                self.watchers.pop(key, None)
+            self.synced = set()
+
+    # --- REPLAY ---
+    def replay(self, ticker, interval, df, delay=0):
+        """Feed a recorded frame (e.g. pd.read_csv(..., index_col=0, parse_dates=True)) bar by bar."""
+        self.track(ticker, interval, history=df.iloc[:0])
+        for ts, o, h, l, c, v in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'], df['Volume']):
+            self.push_bar(ticker, interval, ts, o, h, l, c, v)
+            self._notify_bars([(ticker, interval)])
+            if delay: time.sleep(delay)
+
+
+stream = SignalStream()
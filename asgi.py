@@ -0,0 +1,8 @@
+# asgi.py
+# Production entry point - served by gunicorn with uvicorn workers (see gunicorn.conf.py):
+#   gunicorn -c gunicorn.conf.py asgi:app
+from app import create_app
+from app.asgi import create_asgi_app
+
+flask_app = create_app()
+app = create_asgi_app(flask_app)
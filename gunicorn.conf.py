@@ -0,0 +1,49 @@
+# gunicorn.conf.py
+# Pre-fork uvicorn (ASGI) workers. Each one runs an event loop for the async
+# API (app/api.py) and a thread pool for the Flask pages (WEB_THREADS, app/asgi.py).
+# Everything is overridable via env:
+#
+#   WEB_BIND=0.0.0.0:8000  WEB_WORKERS=4  WEB_THREADS=8  gunicorn -c gunicorn.conf.py asgi:app
+#
+# Graceful reload (new code, no dropped requests):  kill -HUP <master pid>
+# Add / remove a worker on the fly:                 kill -TTIN / -TTOU <master pid>
+# (With WEB_PRELOAD=1 code lives in the master, so HUP only restarts workers -
+#  use kill -USR2 to re-exec the master for new code.)
+import multiprocessing
+import os
+
+bind = os.environ.get('WEB_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# Upstream calls (Yahoo / RSS) can take several seconds
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers now and then so memory from big frames can't pile up
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# Optionally load the app once in the master, then fork (faster boot, less memory).
+# DB and cache connections are opened lazily per worker after the fork.
+preload_app = os.environ.get('WEB_PRELOAD', '0') == '1'
+
+pidfile = os.environ.get('WEB_PIDFILE', 'instance/gunicorn.pid')
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    os.makedirs(os.path.dirname(pidfile) or '.', exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Drop any DB connections inherited from a preloaded master
+    if not preload_app: return
+    from app import db
+    from asgi import flask_app
+    with flask_app.app_context():
+        db.engine.dispose()
+
+# The stream poller is started per worker by the ASGI lifespan (app/asgi.py)
@@ -0,0 +1,267 @@
+# loadtest.py
+# Offline load test for the API routes.
+#
+# 1. Record fixtures once (needs internet):
+#       python loadtest.py record --tickers RELIANCE,TCS,INFY
+# 2. Replay as often as you like (no internet):
+#       python loadtest.py run --users 25 --duration 30 --latency 150
+#    or against a running server started with TRADEGUIDE_FIXTURES=replay:
+#       python loadtest.py run --url http://127.0.0.1:5000
+# 3. /api/analyze response serialization, before vs after results.py + orjson
+#    (synthetic bars, no fixtures needed):
+#       python loadtest.py serialize --bars 250,1500
+# Without --url the app is served by an in-process uvicorn on a free local port
+# (same ASGI stack as production), on a throwaway database + shared cache in a
+# temp dir. Those runs keep the shared cache OFF unless you pass --cache.
+# With --url the `loadtest` user is registered on the target server if needed.
+# Only 2xx responses count as OK (redirects, e.g. to /login, are errors).
+import argparse
+import atexit
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+USERNAME = "loadtest"
+PASSWORD = "loadtest123"
+NEWS_CATEGORIES = ['finance', 'crypto', 'forex', 'economy']
+
+
+def build_app(cache=False):
+    from app import create_app, db
+    from app.asgi import create_asgi_app
+    from app.cache import shared_cache
+    from app.models import User
+    # Cache off by default: a warm cache would hide the upstream (fixture) latency
+    shared_cache.enabled = cache
+    # Never touch instance/ - users, history and cache live in a temp dir
+    workdir = tempfile.mkdtemp(prefix='tradeguide-loadtest-')
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+                      'SHARED_CACHE_PATH': os.path.join(workdir, 'shared_cache.db')})
+    with app.app_context():
+        if not User.query.filter_by(username=USERNAME).first():
+            user = User(username=USERNAME, email="loadtest@tradeguide.local")
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+    return create_asgi_app(app, polling=False)
+
+
+def serve(asgi_app):
+    """Run the app on uvicorn in a background thread -> its base URL."""
+    import socket
+    import uvicorn
+    with socket.socket() as sock:  # grab a free port, then let uvicorn bind it
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host='127.0.0.1', port=port, log_level='warning', access_log=False))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+class HttpClient:
+    """Real HTTP against a running server."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def login(self):
+        """Log in (registering the user first if the server doesn't know it) -> True on success."""
+        form = {'username': USERNAME, 'password': PASSWORD}
+        if self.logged_in(self.session.post(f"{self.base_url}/login", data=form, allow_redirects=False, timeout=60)):
+            return True
+        form['email'] = f"{USERNAME}@tradeguide.local"
+        return self.logged_in(self.session.post(f"{self.base_url}/register", data=form, allow_redirects=False, timeout=60))
+
+    @staticmethod
+    def logged_in(resp):
+        # Success is a redirect to the dashboard; a failed login re-renders the
+        # form (200) or bounces back to /login
+        return resp.status_code in (301, 302, 303) and '/login' not in resp.headers.get('Location', '/login')
+
+    def get(self, path):
+        return self.session.get(self.base_url + path, allow_redirects=False, timeout=60).status_code
+
+    def post_json(self, path, payload):
+        return self.session.post(self.base_url + path, json=payload, allow_redirects=False, timeout=60).status_code
+
+
+def connect(base_url):
+    client = HttpClient(base_url)
+    if not client.login():
+        sys.exit(f"❌ Could not log in (or register) as '{USERNAME}' on {base_url}")
+    return client
+
+
+def scenario(tickers, intervals):
+    """(name, weight, action) - action(client, rng) returns the status code."""
+    return [
+        ('/api/analyze', 4, lambda c, rng: c.post_json('/api/analyze', {
+            'ticker': rng.choice(tickers), 'market': 'NSE', 'interval': rng.choice(intervals)})),
+        ('/api/market_status', 3, lambda c, rng: c.get('/api/market_status')),
+        ('/api/hero_stats', 2, lambda c, rng: c.get('/api/hero_stats')),
+        ('/news', 1, lambda c, rng: c.get(f"/news?cat={rng.choice(NEWS_CATEGORIES)}")),
+    ]
+
+
+# --- RECORD ---
+def record(args):
+    from app import market_data
+    market_data.configure(mode='record', directory=args.fixtures)
+    client = connect(serve(build_app(cache=False)))  # every call must reach upstream to be recorded
+
+    for name, _, action in scenario(args.tickers, args.intervals):
+        if name == '/api/analyze':
+            for ticker in args.tickers:
+                for interval in args.intervals:
+                    print(f"Recording {name} {ticker} [{interval}] -> {client.post_json(name, {'ticker': ticker, 'market': 'NSE', 'interval': interval})}")
+        elif name == '/news':
+            for cat in NEWS_CATEGORIES:
+                print(f"Recording /news?cat={cat} -> {client.get(f'/news?cat={cat}')}")
+        else:
+            print(f"Recording {name} -> {action(client, random.Random(0))}")
+    print(f"✅ Fixtures saved to {os.path.abspath(args.fixtures)}")
+
+
+# --- RUN ---
+def percentile(values, pct):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[int(round(pct / 100 * (len(values) - 1)))]
+
+
+def run(args):
+    base_url = args.url
+    if not base_url:
+        from app import market_data
+        market_data.configure(mode='replay', directory=args.fixtures, latency_ms=args.latency)
+        base_url = serve(build_app(cache=args.cache))
+
+    steps = scenario(args.tickers, args.intervals)
+    weights = [w for _, w, _ in steps]
+    results = []  # (endpoint, seconds, ok)
+    lock = threading.Lock()
+
+    clients = [connect(base_url) for _ in range(args.users)]  # fail fast, before the clock starts
+    deadline = time.perf_counter() + args.duration
+
+    def user(n):
+        rng = random.Random(args.seed + n)
+        client = clients[n]
+        local = []
+        while time.perf_counter() < deadline:
+            name, _, action = rng.choices(steps, weights=weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = 200 <= action(client, rng) < 300
+            except Exception:
+                ok = False
+            local.append((name, time.perf_counter() - start, ok))
+        with lock:
+            results.extend(local)
+
+    target = f"HTTP {args.url}" if args.url else f"in-process replay, cache {'on' if args.cache else 'off'}"
+    print(f"--- {args.users} users for {args.duration}s ({target}) ---")
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(args.users)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{'endpoint':<22}{'reqs':>7}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name in [s[0] for s in steps] + ['TOTAL']:
+        rows = results if name == 'TOTAL' else [r for r in results if r[0] == name]
+        times = [r[1] * 1000 for r in rows]
+        errors = sum(1 for r in rows if not r[2])
+        print(f"{name:<22}{len(rows):>7}{errors:>8}{percentile(times, 50):>10.1f}{percentile(times, 90):>10.1f}"
+              f"{percentile(times, 99):>10.1f}{max(times, default=0):>10.1f}")
+    print(f"Throughput: {len(results) / elapsed:.1f} req/s")
+
+
+# --- SERIALIZATION BENCHMARK ---
+def synthetic_bars(n, seed=0):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) * 1.005, 'Low': np.minimum(open_, close) * 0.995,
+                         'Close': close, 'Volume': rng.integers(50_000, 150_000, n).astype(float)},
+                        index=pd.date_range('2024-01-01 09:15', periods=n, freq='5min', tz='Asia/Kolkata'))
+
+
+def measure(build, repeat):
+    """CPU ms per response, peak bytes allocated while building one, response size."""
+    import tracemalloc
+    build()  # warm-up
+    start = time.process_time()
+    for _ in range(repeat):
+        body = build()
+    cpu_ms = (time.process_time() - start) / repeat * 1000
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return cpu_ms, peak, len(body)
+
+
+def serialize(args):
+    import orjson
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from app.analysis import TradeGuideEngine
+    from app.fastjson import OrjsonProvider, _default
+    from app.results import candles
+
+    stdlib_json = DefaultJSONProvider(Flask(__name__))  # the provider jsonify() used before fastjson.py
+
+    print(f"{'bars':>6}  {'path':<34}{'CPU ms':>9}{'peak KiB':>11}{'bytes':>10}")
+    for n in args.bars:
+        engine = TradeGuideEngine('BENCH.NS')
+        engine.data = synthetic_bars(n)
+        frame = engine.build_frame()
+        result = engine.build_result(frame)
+
+        def before():
+            # Chart as a dict + list per candle, the result as plain dicts -> stdlib json
+            data = {name: getattr(result, name) for name in result.__slots__}
+            data['levels'] = {name: getattr(result.levels, name) for name in result.levels.__slots__}
+            data['chart_data'] = [{'x': int(idx.timestamp() * 1000), 'y': [row['Open'], row['High'], row['Low'], row['Close']]}
+                                  for idx, row in frame.iterrows()]
+            return stdlib_json.dumps({'success': True, 'data': data, 'news': {}}).encode()
+
+        def after():
+            # Chart as one (n, 5) float64 array, slotted result -> orjson
+            result.chart_data = candles(frame)
+            return orjson.dumps({'success': True, 'data': result, 'news': {}}, default=_default, option=OrjsonProvider.option)
+
+        for name, build in (('before: dicts + stdlib json', before), ('after:  slots + ndarray + orjson', after)):
+            cpu_ms, peak, size = measure(build, args.repeat)
+            print(f"{n:>6}  {name:<34}{cpu_ms:>9.2f}{peak / 1024:>11.1f}{size:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TradeGuide AI offline load test")
+    parser.add_argument('mode', choices=['record', 'run', 'serialize'])
+    parser.add_argument('--tickers', default='RELIANCE,TCS,INFY,HDFCBANK', type=lambda s: s.split(','))
+    parser.add_argument('--intervals', default='1d,5m', type=lambda s: s.split(','))
+    parser.add_argument('--fixtures', default=os.environ.get('TRADEGUIDE_FIXTURE_DIR', 'fixtures'))
+    parser.add_argument('--users', default=10, type=int)
+    parser.add_argument('--duration', default=20, type=float, help="seconds")
+    parser.add_argument('--latency', default=0, type=float, help="artificial upstream latency per call (ms)")
+    parser.add_argument('--seed', default=42, type=int)
+    parser.add_argument('--url', default=None, help="hit a running server instead of an in-process app")
+    parser.add_argument('--cache', action='store_true', help="keep the shared cache on (measures cache hits, not upstream latency)")
+    parser.add_argument('--bars', default='250,1500', type=lambda s: [int(n) for n in s.split(',')], help="serialize: chart sizes")
+    parser.add_argument('--repeat', default=200, type=int, help="serialize: responses per measurement")
+    args = parser.parse_args()
+
+    {'record': record, 'run': run, 'serialize': serialize}[args.mode](args)
@@ -1,4 +1,7 @@
 # run.py
+# Development server (uvicorn, auto-reload). For production use gunicorn:
+#   gunicorn -c gunicorn.conf.py asgi:app
+import os
 import sys
 
 print("--- Starting TradeGuide AI ---")
@@ -11,13 +14,17 @@ except Exception as e:
     sys.exit(1)
 
 try:
-    app = create_app()
+    import asgi
     print("2. App Instance Created... OK")
 except Exception as e:
     print(f"!!! Error creating app: {e}")
     sys.exit(1)
 
 if __name__ == '__main__':
+    import uvicorn
+
     print("3. Starting Server on http://127.0.0.1:5000 ...")
-    # Debug=True allows you to see errors in the browser
-    app.run(debug=True)
\ No newline at end of file
+    # Debug reloads on code changes (set FLASK_DEBUG=0 to turn off).
+    # Intraday stream + alert polling is started by the app's lifespan (app/asgi.py)
+    debug = os.environ.get('FLASK_DEBUG', '1') == '1'
+    uvicorn.run('asgi:app' if debug else asgi.app, host='127.0.0.1', port=5000, reload=debug)
\ No newline at end of file
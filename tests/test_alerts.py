@@ -0,0 +1,28 @@
+# Alert rule firing (alerts.AlertEngine._fire) on streamed snapshots.
+import numpy as np
+from app.alerts import AlertEngine
+from app.streaming import SignalState
+from tests.test_streaming_parity import synthetic_bars
+
+
+def fire(kind, prev, now, threshold):
+    return AlertEngine()._fire('TEST.NS', kind, prev, now, np.array([1]), np.array([1]), np.array([threshold]))
+
+
+def test_undefined_rsi_never_crosses():
+    bars = synthetic_bars(30)
+    state = SignalState('TEST.NS', '5m')
+    snapshots = []
+    for ts, row in bars.iterrows():
+        state.update(ts, row['Open'], row['High'], row['Low'], row['Close'], row['Volume'])
+        snapshots.append(state.snapshot())
+
+    assert snapshots[5]['rsi'] is None  # still warming up (scoring would say 50.0)
+    assert not fire('RSI_ABOVE', snapshots[5], {**snapshots[5], 'rsi': 60.0}, 55.0)
+    assert not fire('RSI_BELOW', snapshots[5], {**snapshots[5], 'rsi': 40.0}, 45.0)
+
+
+def test_rsi_band_cross_fires():
+    prev = {'price': 1.0, 'signal': 'BUY', 'adx': 20.0, 'rsi': 68.0, 'golden_pocket': 1.0, 'levels': []}
+    assert len(fire('RSI_ABOVE', prev, {**prev, 'rsi': 71.0}, 70.0)) == 1
+    assert not fire('RSI_ABOVE', prev, {**prev, 'rsi': 69.0}, 70.0)
@@ -0,0 +1,114 @@
+# ASGI app (asgi.py): native async API (api.py) next to the Flask pages, plus the
+# Yahoo chart parser behind market_data.history_async.
+import asyncio
+import json
+import math
+import orjson
+import pytest
+from app import create_app, db, market_data
+from app.aio import runtime
+from app.asgi import create_asgi_app
+from app.models import User, History
+from tests.test_streaming_parity import synthetic_bars
+
+
+@pytest.fixture
+def asgi_app(tmp_path, monkeypatch):
+    monkeypatch.setitem(market_data.config, 'mode', 'replay')
+    monkeypatch.setitem(market_data.config, 'directory', str(tmp_path / 'fixtures'))
+    monkeypatch.setitem(market_data.config, 'latency', 0)
+    flask_app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+                            'SHARED_CACHE_PATH': str(tmp_path / 'cache.db')})
+    with flask_app.app_context():
+        user = User(username='api', email='api@test.local')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+    return create_asgi_app(flask_app, polling=False)
+
+
+def call(app, method, path, body=b'', headers=()):
+    scope = {'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+             'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+             'headers': [*headers, (b'content-length', str(len(body)).encode())],
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)}
+    incoming = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        await runtime.close()
+
+    asyncio.run(run())
+    return sent[0]['status'], dict(sent[0]['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+
+def login(app):
+    status, headers, _ = call(app, 'POST', '/login', b'username=api&password=secret',
+                              [(b'content-type', b'application/x-www-form-urlencoded')])
+    assert status == 302 and b'/dashboard' in headers[b'location']
+    return (b'cookie', headers[b'set-cookie'].split(b';')[0])
+
+
+def test_api_requires_the_flask_session(asgi_app):
+    status, headers, body = call(asgi_app, 'GET', '/api/hero_stats')
+    assert status == 401 and headers[b'content-type'] == b'application/json'
+    assert orjson.loads(body) == {'success': False, 'error': 'Login required'}
+
+    status, _, _ = call(asgi_app, 'GET', '/api/analyze', headers=[login(asgi_app)])
+    assert status == 405
+
+
+def test_pages_are_still_served_by_flask(asgi_app):
+    status, headers, body = call(asgi_app, 'GET', '/login')
+    assert status == 200 and b'TradeGuide AI' in body
+
+
+def test_analyze_on_the_event_loop(asgi_app):
+    key = {'symbol': 'TEST.NS', 'period': '1y', 'interval': '1d'}
+    market_data._save('history', key, 'pkl', synthetic_bars(200).to_pickle)
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([{'title': 'Test shares rally to a record high'}], f)
+    market_data._save('news', {'symbol': 'TEST.NS'}, 'json', write)
+
+    cookie = login(asgi_app)
+    status, _, body = call(asgi_app, 'POST', '/api/analyze', orjson.dumps({'ticker': 'TEST', 'market': 'NSE'}),
+                           [cookie, (b'content-type', b'application/json')])
+    payload = orjson.loads(body)
+    assert status == 200 and payload['success']
+    assert payload['data']['ticker'] == 'TEST.NS' and payload['data']['signal']
+    # dataclasses + the chart array serialize natively (orjson, no to_dict)
+    assert set(payload['data']['levels']) == {'entry', 'target', 'stoploss'}
+    assert len(payload['data']['chart_data']) == 200 and len(payload['data']['chart_data'][0]) == 5
+
+    with asgi_app.flask_app.app_context():
+        assert History.query.filter_by(ticker='TEST.NS').count() == 1
+
+
+def test_chart_frame_matches_yfinance_history_shape():
+    payload = {'chart': {'error': None, 'result': [{
+        'meta': {'exchangeTimezoneName': 'Asia/Kolkata'},
+        'timestamp': [1717990200, 1718076600, 1718163000],  # 09:15 IST, three sessions
+        'indicators': {
+            'quote': [{'open': [100.0, None, 104.0], 'high': [102.0, None, 106.0], 'low': [99.0, None, 103.0],
+                       'close': [101.0, None, 105.0], 'volume': [1000, None, 1200]}],
+            'adjclose': [{'adjclose': [50.5, None, 105.0]}],
+        },
+    }]}}
+    df = market_data.chart_frame(payload, '1d')
+
+    assert list(df.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert len(df) == 2  # the empty bar is dropped
+    assert str(df.index.tz) == 'Asia/Kolkata' and df.index[0].hour == 0  # daily bars at local midnight
+    assert df['Close'].iloc[0] == 50.5 and df['Open'].iloc[0] == 50.0  # adjusted by adjclose / close
+    assert df['Close'].iloc[1] == 105.0
+
+    assert market_data.chart_frame({'chart': {'result': None, 'error': {'code': 'Not Found'}}}).empty
+    assert not math.isnan(df['Volume'].iloc[0])
@@ -0,0 +1,82 @@
+# SignalStream polling: lease + poll_once against a stubbed market_data.download.
+from types import SimpleNamespace
+import pytest
+from app import market_data
+from app.cache import shared_cache
+from app.streaming import SignalStream
+from tests.test_streaming_parity import synthetic_bars
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, 'path', None)
+    shared_cache.init_app(SimpleNamespace(instance_path=str(tmp_path),
+                                          config={'SHARED_CACHE_PATH': str(tmp_path / 'cache.db')}))
+    return shared_cache
+
+
+def test_lead_holds_the_stream_lease(cache, monkeypatch):
+    stream = SignalStream()
+    stream.lease_ttl = 30
+    assert stream.lead()
+    assert stream.lead()  # renewing our own lease
+
+    monkeypatch.setattr('os.getpid', lambda: 999999)  # another worker
+    assert not stream.lead()
+
+
+def test_poll_once_feeds_closed_bars(cache, monkeypatch):
+    bars = synthetic_bars(200)
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append((tuple(tickers), kwargs['interval']))
+        return bars.iloc[:150]
+    monkeypatch.setattr(market_data, 'download', download)
+
+    stream = SignalStream()
+    stream.track('TEST.NS', '5m', history=bars.iloc[:100])
+    refreshed = []
+    stream.on_bars(refreshed.append)
+    stream.lease_ttl = 30
+
+    assert stream.lead()
+    stream.poll_once()
+
+    state = stream.states[('TEST.NS', '5m')]
+    assert calls == [(('TEST.NS',), '5m')]
+    assert state.last_ts == bars.index[148]  # bar 149 is still forming
+    assert list(refreshed[0]) == [('TEST.NS', '5m')]
+    assert stream.latest_signal('TEST.NS', '5m') == state.signal
+
+
+def test_poll_once_tracks_source_keys(cache, monkeypatch):
+    bars = synthetic_bars(120)
+    monkeypatch.setattr(market_data, 'download', lambda tickers, **kwargs: bars)
+    monkeypatch.setattr('app.analysis.TradeGuideEngine.fetch_data',
+                        lambda self, interval='1d': setattr(self, 'data', bars.iloc[:100]) or True)
+
+    wanted = {('TEST.NS', '1d')}
+    stream = SignalStream()
+    stream.keep_tracked(lambda: wanted)
+    stream.poll_once()
+    assert stream.tracked() == [('TEST.NS', '1d')]
+
+    wanted.clear()
+    stream.poll_once()
+    assert stream.tracked() == []
+
+
+def test_seed_skips_the_forming_bar(cache, monkeypatch):
+    bars = synthetic_bars(120)
+    monkeypatch.setattr('app.analysis.TradeGuideEngine.fetch_data',
+                        lambda self, interval='1d': setattr(self, 'data', bars.iloc[:100]) or True)
+    monkeypatch.setattr(market_data, 'download', lambda tickers, **kwargs: bars.iloc[:101])
+
+    stream = SignalStream()
+    state = stream.track('TEST.NS', '5m')
+    assert state.last_ts == bars.index[98]
+
+    stream.poll_once()  # bar 99 has closed now - its final OHLCV must be applied
+    assert state.last_ts == bars.index[99]
+    assert state.price == bars['Close'].iloc[99]
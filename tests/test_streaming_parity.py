@@ -0,0 +1,68 @@
+# Streaming (indicators.py / streaming.SignalState) vs vectorized (TradeGuideEngine.build_frame).
+# Both paths must agree bar for bar - if you change one, change the other.
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from app.analysis import TradeGuideEngine
+from app.streaming import SignalState
+
+
+def synthetic_bars(n=160, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.003, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.integers(50_000, 150_000, n).astype(float)
+    index = pd.date_range('2024-01-01 09:15', periods=n, freq='5min', tz='Asia/Kolkata')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def same(streamed, batch):
+    if streamed is None or (isinstance(streamed, float) and math.isnan(streamed)):
+        return pd.isna(batch)
+    return not pd.isna(batch) and streamed == pytest.approx(float(batch), rel=1e-9, abs=1e-9)
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return synthetic_bars()
+
+
+def test_indicators_match_frame_bar_for_bar(bars):
+    engine = TradeGuideEngine('TEST.NS')
+    engine.data = bars
+    frame = engine.build_frame()
+    state = SignalState('TEST.NS', '5m')
+
+    traps = 0
+    for i, (ts, row) in enumerate(bars.iterrows()):
+        state.update(ts, row['Open'], row['High'], row['Low'], row['Close'], row['Volume'])
+        expected = frame.iloc[i]
+
+        assert same(state.adx.adx, expected['ADX']), f"ADX differs at bar {i}"
+        assert same(state.ema_9.current, expected['EMA_9']), f"EMA_9 differs at bar {i}"
+        assert same(state.ema_21.current, expected['EMA_21']), f"EMA_21 differs at bar {i}"
+        assert same(state.rsi.rsi, expected['RSI']), f"RSI differs at bar {i}"
+        assert same(state.trap.vol_z, expected['VOL_Z']), f"VOL_Z differs at bar {i}"
+        assert same(state.decay.hv, expected['HV']), f"HV differs at bar {i}"
+        assert state.trap.trap == expected['TRAP'], f"TRAP differs at bar {i}"
+        assert state.decay.decay == expected['DECAY'], f"DECAY differs at bar {i}"
+        traps += expected['TRAP'] is not None
+
+    assert traps, "synthetic data should contain at least one trap"
+
+
+def test_signal_matches_generate_signal_on_every_prefix(bars):
+    engine = TradeGuideEngine('TEST.NS')
+    state = SignalState('TEST.NS', '5m')
+
+    for i, (ts, row) in enumerate(bars.iterrows()):
+        state.update(ts, row['Open'], row['High'], row['Low'], row['Close'], row['Volume'])
+        if i < 30 or i % 5: continue  # indicators need a warm-up; every 5th bar keeps it quick
+
+        engine.data = bars.iloc[:i + 1]
+        result = engine.build_result(engine.build_frame())
+        assert state.signal == result.signal, f"signal differs at bar {i}"
+        assert state.scored['score'] == result.score, f"score differs at bar {i}"